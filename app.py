@@ -1,22 +1,37 @@
 from __future__ import annotations
 
-import json
+from dataclasses import asdict
 from datetime import date
 from pathlib import Path
 
 import streamlit as st
 
+from companies import CompanyRegister, prefill_applicant
 from core import evaluate_rules, readiness_score
-from pdfgen import generate_credit_summary_pdf
+from dealcache import DealCache, DealConflict, copy_tree, merge_deals
+from models import new_deal
+from postcodes import PostcodeIndex, normalise_postcode
+from templates import render
 
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
+POSTCODE_INDEX_PATH = DATA_DIR / "ref" / "postcodes.idx"
+COMPANY_REGISTER_PATH = DATA_DIR / "ref" / "companies.sqlite"
 
 st.set_page_config(page_title="UK Vehicle Hire Finance Packager (MVP)", layout="wide")
 st.title("UK Vehicle Hire Finance Packager (MVP)")
 st.caption("Broker-style intake + pack readiness checks + lender-friendly PDF credit summary. No lender integrations.")
 
 
+def widget_key(name):
+    """
+    Widget keys carry the session's load counter, so replacing the deal
+    (load, merge, reload) starts every keyed widget afresh from the new data
+    instead of writing the previous deal's values back.
+    """
+    return f"{name}@{st.session_state.get('appload', 0)}"
+
+
 def money_input(label, key_prefix, default_amt=None):
     col1, col2 = st.columns([2, 1])
     with col1:
@@ -25,182 +40,106 @@ def money_input(label, key_prefix, default_amt=None):
             min_value=0.0,
             value=float(default_amt or 0.0),
             step=100.0,
-            key=f"{key_prefix}_amt",
+            key=widget_key(f"{key_prefix}_amt"),
         )
     with col2:
-        cur = st.selectbox("Currency", ["GBP"], index=0, key=f"{key_prefix}_cur")
+        cur = st.selectbox("Currency", ["GBP"], index=0, key=widget_key(f"{key_prefix}_cur"))
     return {"amount": float(amt), "currency": cur}
 
 
+def postcode_input(label, value, key=None):
+    raw = st.text_input(label, value=value, key=key)
+    return normalise_postcode(raw) or raw
+
+
+@st.cache_resource
+def load_postcode_index():
+    if not POSTCODE_INDEX_PATH.exists():
+        return None
+    return PostcodeIndex(POSTCODE_INDEX_PATH)
+
+
+@st.cache_resource
+def get_deal_cache():
+    return DealCache(DATA_DIR)
+
+
+@st.cache_resource
+def get_portfolio():
+    # Imported on first save: the portfolio store pulls in sqlite3.
+    from portfolio import PORTFOLIO_FILENAME, Portfolio
+
+    return Portfolio(DATA_DIR / PORTFOLIO_FILENAME)
+
+
+@st.cache_resource
+def load_company_register():
+    if not COMPANY_REGISTER_PATH.exists():
+        return None
+    return CompanyRegister(COMPANY_REGISTER_PATH)
+
+
+def merge_base(conflict):
+    """
+    Common ancestor for merging with a conflicting save. The session's base
+    only applies if it was loaded from that same deal; otherwise there is
+    none and every differing field is a conflict.
+    """
+    if st.session_state.get("appref") != conflict["ref"]:
+        return None
+    return st.session_state.get("appbase")
+
+
 with st.sidebar:
     st.header("Application file")
     app_id = st.text_input("Deal reference (file name)", value="deal_001")
     load_btn = st.button("Load")
     save_btn = st.button("Save")
+    merge_btn = reload_btn = False
+    conflict = st.session_state.get("save_conflict")
+    if conflict and conflict["ref"] == app_id:
+        st.warning(f"{app_id} was saved by someone else since you loaded it.")
+        if conflict["theirs"] is not None:
+            _, conflicting = merge_deals(merge_base(conflict), st.session_state["appdata"], conflict["theirs"])
+            if conflicting:
+                st.write("Changed on both sides (yours will be kept):")
+                st.write(conflicting[:10])
+        merge_btn = st.button("Merge and save")
+        if conflict["theirs"] is not None:
+            reload_btn = st.button("Discard my changes and load theirs")
     st.divider()
     export_pdf_btn = st.button("Generate PDF Credit Summary")
 
-app_path = DATA_DIR / f"{app_id}.json"
+deal_cache = get_deal_cache()
 
 
 def default_app():
-    return {
-        "broker": {
-            "brokerFirmName": "",
-            "brokerContactName": "",
-            "brokerContactEmail": "",
-            "brokerContactPhone": "",
-            "internalDealRef": app_id,
-            "targetLenderProfiles": [],
-            "notesInternal": "",
-        },
-        "applicant": {
-            "legalName": "",
-            "tradingName": "",
-            "legalStructure": "limited_company",
-            "companyNumber": "",
-            "utr": "",
-            "vatRegistered": True,
-            "vatNumber": "",
-            "incorporationDate": str(date.today()),
-            "yearsTrading": 3,
-            "sicCodes": [],
-            "registeredAddress": {
-                "line1": "",
-                "line2": "",
-                "townCity": "",
-                "county": "",
-                "postcode": "",
-                "country": "UK",
-            },
-            "tradingAddresses": [],
-            "primaryContact": {"name": "", "roleTitle": "", "email": "", "phone": ""},
-            "banking": {"primaryBankName": ""},
-            "industry": {"isVehicleHire": True, "subSector": "mixed"},
-        },
-        "controllers": {
-            "directors": [
-                {
-                    "fullName": "",
-                    "dob": "1980-01-01",
-                    "homePostcode": "",
-                    "homeAddress": None,
-                    "role": "director",
-                    "ownershipPercent": 0,
-                    "isPrimaryGuarantor": True,
-                }
-            ],
-            "shareholdersOrPSCs": [],
-            "groupStructure": {"isGroup": False, "parentCompanyName": ""},
-            "guarantees": {
-                "personalGuaranteeExpected": "unknown",
-                "pgType": "limited",
-                "guarantors": [],
-            },
-        },
-        "facility": {
-            "financePurpose": "growth",
-            "productType": "hire_purchase",
-            "repaymentProfile": "monthly",
-            "termMonths": 48,
-            "deposit": {"amount": 0, "currency": "GBP"},
-            "balloonOrResidual": {"amount": 0, "currency": "GBP"},
-            "totalAmountRequested": {"amount": 0, "currency": "GBP"},
-            "vatTreatment": "vat_on_purchase_reclaimable",
-            "speedRequirement": "standard",
-            "preferredPaymentDay": 1,
-        },
-        "assets": {
-            "batches": [
-                {
-                    "batchRef": "BATCH-1",
-                    "vehicleType": "van",
-                    "newOrUsed": "new",
-                    "quantity": 1,
-                    "avgUnitPrice": {"amount": 0, "currency": "GBP"},
-                    "totalPrice": {"amount": 0, "currency": "GBP"},
-                    "avgVehicleAgeMonths": None,
-                    "mileageRange": None,
-                    "makeModelKnown": False,
-                    "make": "",
-                    "model": "",
-                    "fuelType": "diesel",
-                    "supplierName": "",
-                    "quoteReference": "",
-                    "expectedDeliveryDate": "",
-                    "securityNotes": "",
-                }
-            ],
-            "suppliers": [
-                {
-                    "supplierName": "",
-                    "supplierType": "independent_dealer",
-                    "contactName": "",
-                    "contactEmail": "",
-                    "contactPhone": "",
-                    "address": None,
-                }
-            ],
-        },
-        "financials": {
-            "accounts": {
-                "lastFiledYearEnd": "",
-                "turnover": {"amount": 0, "currency": "GBP"},
-                "ebitda": {"amount": 0, "currency": "GBP"},
-                "netProfit": {"amount": 0, "currency": "GBP"},
-                "netAssets": {"amount": 0, "currency": "GBP"},
-                "totalBorrowings": {"amount": 0, "currency": "GBP"},
-            },
-            "managementAccounts": {
-                "periodEnd": "",
-                "ytdTurnover": {"amount": 0, "currency": "GBP"},
-                "ytdEbitda": {"amount": 0, "currency": "GBP"},
-                "lastMonthTurnover": {"amount": 0, "currency": "GBP"},
-                "lastMonthEbitda": {"amount": 0, "currency": "GBP"},
-            },
-            "bankingEvidence": {
-                "statementsMonthsProvided": 0,
-                "avgMonthlyCredits": {"amount": 0, "currency": "GBP"},
-                "avgMonthlyDebits": {"amount": 0, "currency": "GBP"},
-                "minMonthEndBalance": {"amount": 0, "currency": "GBP"},
-            },
-            "existingDebt": {
-                "monthlyFinanceCommitments": {"amount": 0, "currency": "GBP"},
-                "fleetFinanceCommitments": {"amount": 0, "currency": "GBP"},
-                "otherDebtCommitments": {"amount": 0, "currency": "GBP"},
-            },
-        },
-        "fleetOps": {
-            "fleetSizeTotal": 0,
-            "fleetOwned": 0,
-            "fleetLeasedOrFinanced": 0,
-            "avgUtilisationPercent": 0,
-            "avgRevenuePerVehiclePerMonth": {"amount": 0, "currency": "GBP"},
-            "avgMaintenanceCostPerVehiclePerMonth": {"amount": 0, "currency": "GBP"},
-            "customerConcentrationPercentTop1": "",
-            "customerConcentrationPercentTop5": "",
-            "contractCoverageNarrative": "",
-        },
-        "risk": {
-            "hasCCJsOrInsolvency": "unknown",
-            "anyLateTaxOrVAT": "unknown",
-            "adverseTradingEvents": [],
-            "brokerNarrative": "",
-        },
-        "consents": {"hasAuthorityToShareData": False, "dataProcessingConsent": False},
-    }
+    return new_deal(app_id)
+
+
+def set_session_deal(data, version):
+    """`appbase` and `appversion` are what the session last loaded or saved."""
+    if data is not st.session_state.get("appdata"):
+        # New data, not the widgets' own edits being saved: reset the widgets.
+        st.session_state["appload"] = st.session_state.get("appload", 0) + 1
+    st.session_state["appdata"] = data
+    st.session_state["appbase"] = copy_tree(data) if version is not None else None
+    st.session_state["appversion"] = version
+    st.session_state["appref"] = app_id
+    st.session_state.pop("save_conflict", None)
 
 
 if load_btn:
-    if app_path.exists():
-        st.session_state["appdata"] = json.loads(app_path.read_text())
-        st.success(f"Loaded {app_path}")
+    data, version = deal_cache.load(app_id)
+    if data is not None:
+        set_session_deal(data, version)
+        st.success(f"Loaded {app_id}")
     else:
-        st.session_state["appdata"] = default_app()
+        set_session_deal(default_app(), None)
         st.info("No saved file found; started a new application.")
 
 if "appdata" not in st.session_state:
-    st.session_state["appdata"] = default_app()
+    set_session_deal(default_app(), None)
 
 app = st.session_state["appdata"]
 
@@ -257,6 +196,14 @@ with tab1:
             app["applicant"]["companyNumber"] = st.text_input(
                 "Company number", value=app["applicant"]["companyNumber"]
             )
+            company_register = load_company_register()
+            if company_register is not None and st.button("Prefill from company register"):
+                rec = company_register.lookup(app["applicant"]["companyNumber"])
+                if rec is None:
+                    st.warning("Company number not found in the register snapshot.")
+                else:
+                    prefill_applicant(app["applicant"], rec)
+                    st.rerun()
             app["applicant"]["incorporationDate"] = str(
                 st.date_input(
                     "Incorporation date",
@@ -289,7 +236,7 @@ with tab1:
         ra["line2"] = st.text_input("Reg addr line 2", value=ra.get("line2", ""))
         ra["townCity"] = st.text_input("Reg addr town/city", value=ra.get("townCity", ""))
         ra["county"] = st.text_input("Reg addr county", value=ra.get("county", ""))
-        ra["postcode"] = st.text_input("Reg addr postcode", value=ra.get("postcode", ""))
+        ra["postcode"] = postcode_input("Reg addr postcode", ra.get("postcode", ""))
 
         st.markdown("**Primary contact**")
         pc = app["applicant"]["primaryContact"]
@@ -311,20 +258,20 @@ with tab2:
     directors = app["controllers"]["directors"]
     for i, d in enumerate(directors):
         with st.expander(f"Director {i+1}: {d.get('fullName') or '(name)'}", expanded=(i == 0)):
-            d["fullName"] = st.text_input("Full name", value=d.get("fullName", ""), key=f"dir_name_{i}")
+            d["fullName"] = st.text_input("Full name", value=d.get("fullName", ""), key=widget_key(f"dir_name_{i}"))
             d["dob"] = str(
                 st.date_input(
                     "Date of birth",
                     value=date.fromisoformat(d.get("dob", "1980-01-01")),
-                    key=f"dir_dob_{i}",
+                    key=widget_key(f"dir_dob_{i}"),
                 )
             )
-            d["homePostcode"] = st.text_input("Home postcode", value=d.get("homePostcode", ""), key=f"dir_pc_{i}")
+            d["homePostcode"] = postcode_input("Home postcode", d.get("homePostcode", ""), key=widget_key(f"dir_pc_{i}"))
             d["ownershipPercent"] = st.number_input(
                 "Ownership % (optional)", min_value=0.0, max_value=100.0, value=float(d.get("ownershipPercent") or 0.0),
-                step=1.0, key=f"dir_own_{i}"
+                step=1.0, key=widget_key(f"dir_own_{i}")
             )
-            d["isPrimaryGuarantor"] = st.checkbox("Primary guarantor", value=bool(d.get("isPrimaryGuarantor", False)), key=f"dir_pg_{i}")
+            d["isPrimaryGuarantor"] = st.checkbox("Primary guarantor", value=bool(d.get("isPrimaryGuarantor", False)), key=widget_key(f"dir_pg_{i}"))
 
     colA, colB = st.columns(2)
     with colA:
@@ -383,14 +330,14 @@ with tab4:
     suppliers = app["assets"]["suppliers"]
     for i, s in enumerate(suppliers):
         with st.expander(f"Supplier {i+1}: {s.get('supplierName') or '(name)'}", expanded=(i == 0)):
-            s["supplierName"] = st.text_input("Supplier name", value=s.get("supplierName", ""), key=f"sup_name_{i}")
+            s["supplierName"] = st.text_input("Supplier name", value=s.get("supplierName", ""), key=widget_key(f"sup_name_{i}"))
             s["supplierType"] = st.selectbox(
                 "Supplier type",
                 ["franchise_dealer", "independent_dealer", "manufacturer", "auction", "broker", "other"],
                 index=["franchise_dealer", "independent_dealer", "manufacturer", "auction", "broker", "other"].index(s.get("supplierType", "independent_dealer")),
-                key=f"sup_type_{i}",
+                key=widget_key(f"sup_type_{i}"),
             )
-            s["contactEmail"] = st.text_input("Contact email", value=s.get("contactEmail", ""), key=f"sup_email_{i}")
+            s["contactEmail"] = st.text_input("Contact email", value=s.get("contactEmail", ""), key=widget_key(f"sup_email_{i}"))
 
     colA, colB = st.columns(2)
     with colA:
@@ -408,19 +355,19 @@ with tab4:
 
     for i, b in enumerate(batches):
         with st.expander(f"Batch {i+1}: {b.get('batchRef')}", expanded=(i == 0)):
-            b["batchRef"] = st.text_input("Batch reference", value=b.get("batchRef", ""), key=f"b_ref_{i}")
+            b["batchRef"] = st.text_input("Batch reference", value=b.get("batchRef", ""), key=widget_key(f"b_ref_{i}"))
             b["vehicleType"] = st.selectbox(
                 "Vehicle type", ["car", "van", "lcv", "hgv", "minibus", "specialist"],
                 index=["car", "van", "lcv", "hgv", "minibus", "specialist"].index(b.get("vehicleType", "van")),
-                key=f"b_vt_{i}",
+                key=widget_key(f"b_vt_{i}"),
             )
             b["newOrUsed"] = st.selectbox(
                 "New or used", ["new", "used"],
                 index=["new", "used"].index(b.get("newOrUsed", "new")),
-                key=f"b_nu_{i}",
+                key=widget_key(f"b_nu_{i}"),
             )
             b["quantity"] = st.number_input(
-                "Quantity", min_value=1, value=int(b.get("quantity") or 1), step=1, key=f"b_qty_{i}"
+                "Quantity", min_value=1, value=int(b.get("quantity") or 1), step=1, key=widget_key(f"b_qty_{i}")
             )
             b["avgUnitPrice"] = money_input(
                 "Average unit price", f"b_price_{i}", default_amt=b.get("avgUnitPrice", {}).get("amount", 0)
@@ -431,7 +378,7 @@ with tab4:
 
             if b["newOrUsed"] == "used":
                 b["avgVehicleAgeMonths"] = st.number_input(
-                    "Average vehicle age (months)", min_value=0, value=int(b.get("avgVehicleAgeMonths") or 0), step=1, key=f"b_age_{i}"
+                    "Average vehicle age (months)", min_value=0, value=int(b.get("avgVehicleAgeMonths") or 0), step=1, key=widget_key(f"b_age_{i}")
                 )
             else:
                 b["avgVehicleAgeMonths"] = None
@@ -439,9 +386,9 @@ with tab4:
             b["supplierName"] = st.selectbox(
                 "Supplier for this batch", supplier_names,
                 index=(supplier_names.index(b.get("supplierName", "")) if b.get("supplierName", "") in supplier_names else 0),
-                key=f"b_sup_{i}",
+                key=widget_key(f"b_sup_{i}"),
             )
-            b["quoteReference"] = st.text_input("Quote / pro-forma reference (optional)", value=b.get("quoteReference", ""), key=f"b_q_{i}")
+            b["quoteReference"] = st.text_input("Quote / pro-forma reference (optional)", value=b.get("quoteReference", ""), key=widget_key(f"b_q_{i}"))
 
     colA, colB = st.columns(2)
     with colA:
@@ -505,7 +452,10 @@ with tab5:
 
 with tab6:
     st.subheader("Readiness")
-    rr = evaluate_rules(app)
+    postcode_index = load_postcode_index()
+    rr = evaluate_rules(app, postcodes=postcode_index, companies=load_company_register())
+    if postcode_index is None:
+        st.caption(f"Postcode reference not loaded ({POSTCODE_INDEX_PATH}); postcodes are format-checked only.")
     status, expl = readiness_score(rr)
     st.metric("Readiness", status, expl)
 
@@ -525,16 +475,46 @@ with tab6:
 
     st.divider()
     st.subheader("Funding narrative (draft)")
-    narrative = f"""
-Applicant: {app['applicant'].get('legalName','')}
-Business: UK vehicle hire ({app['applicant']['industry'].get('subSector','')}).
-Request: {app['facility'].get('productType','')} over {app['facility'].get('termMonths','')} months for {app['facility'].get('financePurpose','')}.
-
-Operations: fleet size {app['fleetOps'].get('fleetSizeTotal','')}, utilisation {app['fleetOps'].get('avgUtilisationPercent','')}%, revenue per vehicle per month approx GBP {app['fleetOps'].get('avgRevenuePerVehiclePerMonth',{}).get('amount',0):,.0f}.
-Key risks addressed: {", ".join(rr.flags) if rr.flags else "no major flags identified in intake"}.
-""".strip()
+    narrative = render("funding_narrative", app, rr)
     st.text_area("Narrative (copy/paste into lender email or pack)", value=narrative, height=180)
+    with st.expander("Lender email (draft)"):
+        st.text_area("Lender email", value=render("lender_email", app, rr), height=320)
+
+if export_pdf_btn:
+    # Imported on demand: reportlab is the heaviest import in the app.
+    from pdfgen import generate_credit_summary_pdf
+
+    pdf_path = DATA_DIR / f"{app_id}_credit_summary.pdf"
+    generate_credit_summary_pdf(
+        app, {"status": status, "explanation": expl, **asdict(rr)}, str(pdf_path), narrative=narrative
+    )
+    st.sidebar.download_button(
+        "Download PDF", data=pdf_path.read_bytes(), file_name=pdf_path.name, mime="application/pdf"
+    )
+
+
+def save_session_deal(data, expected_version, data_rr):
+    try:
+        version = deal_cache.save(app_id, data, expected_version)
+    except DealConflict as e:
+        st.session_state["save_conflict"] = {"ref": app_id, "theirs": e.theirs, "version": e.version}
+        st.rerun()
+    set_session_deal(data, version)
+    get_portfolio().record(app_id, data, data_rr)
+
 
 if save_btn:
-    app_path.write_text(json.dumps(app, indent=2))
-    st.succe
+    expected = st.session_state["appversion"] if st.session_state.get("appref") == app_id else None
+    save_session_deal(app, expected, rr)
+    st.success(f"Saved {app_id}")
+
+if merge_btn:
+    theirs = conflict["theirs"]
+    merged = app if theirs is None else merge_deals(merge_base(conflict), app, theirs)[0]
+    merged_rr = evaluate_rules(merged, postcodes=load_postcode_index(), companies=load_company_register())
+    save_session_deal(merged, conflict["version"], merged_rr)
+    st.rerun()
+
+if reload_btn:
+    set_session_deal(copy_tree(conflict["theirs"]), conflict["version"])
+    st.rerun()
@@ -0,0 +1,107 @@
+"""
+Cold import time of everything app.py imports at startup, against a budget.
+Exits non-zero if a budget is exceeded or a lazily loaded heavy dependency
+(reportlab, dateutil, ...) is imported eagerly. tests/test_import_budget.py
+enforces the same budgets.
+
+    python -m benchmarks.bench_import [--budget-ms 600] [--own-budget-ms 60] [--runs 5]
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+APP_PATH = REPO_ROOT / "app.py"
+LAZY_MODULES = ("reportlab", "dateutil", "sqlite3", "orjson", "msgpack")
+
+# Cold start of the whole app (streamlit included), and of the repo's own
+# modules on top of streamlit.
+BUDGET_MS = 600.0
+OWN_BUDGET_MS = 60.0
+
+
+def startup_modules(app_path: Path = APP_PATH) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Top-level modules imported by app.py at module level, read from its source
+    so the list cannot drift: (third-party, repo-local).
+    """
+    tree = ast.parse(app_path.read_text(encoding="utf-8"))
+    names: List[str] = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.extend(a.name.split(".")[0] for a in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.append(node.module.split(".")[0])
+    third_party: List[str] = []
+    local: List[str] = []
+    for name in dict.fromkeys(names):
+        if name == "__future__" or name in sys.stdlib_module_names:
+            continue
+        (local if (REPO_ROOT / f"{name}.py").exists() else third_party).append(name)
+    return tuple(third_party), tuple(local)
+
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+for m in {third_party!r}:
+    __import__(m)
+t1 = time.perf_counter()
+for m in {local!r}:
+    __import__(m)
+t2 = time.perf_counter()
+print(json.dumps({{
+    "ms": (t2 - t0) * 1000,
+    "own_ms": (t2 - t1) * 1000,
+    "eager": [m for m in {lazy!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(runs: int = 5) -> dict:
+    """Best of `runs` fresh interpreters (each pays the full cold import)."""
+    third_party, local = startup_modules()
+    code = _PROBE.format(third_party=third_party, local=local, lazy=LAZY_MODULES)
+    results = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=REPO_ROOT
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    best = min(results, key=lambda r: r["ms"])
+    best["own_ms"] = min(r["own_ms"] for r in results)
+    best["modules"] = list(third_party + local)
+    return best
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help=f"whole app (default {BUDGET_MS:.0f}ms)")
+    parser.add_argument(
+        "--own-budget-ms", type=float, default=OWN_BUDGET_MS, help=f"repo modules only (default {OWN_BUDGET_MS:.0f}ms)"
+    )
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to sample (default 5)")
+    args = parser.parse_args(argv)
+
+    r = measure(args.runs)
+    print(f"import {', '.join(r['modules'])}")
+    print(f"  total: {r['ms']:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"  repo modules: {r['own_ms']:.1f} ms (budget {args.own_budget_ms:.0f} ms)")
+    ok = True
+    if r["ms"] > args.budget_ms or r["own_ms"] > args.own_budget_ms:
+        print("FAIL: over import time budget")
+        ok = False
+    if r["eager"]:
+        print(f"FAIL: imported eagerly: {', '.join(r['eager'])}")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+"""
+Per-deal memory and load time: nested JSON dicts vs the typed models.
+
+    python -m benchmarks.bench_models [--n 100000]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from models import Deal, new_deal
+
+
+def sample_deal(i: int) -> Dict[str, Any]:
+    d = new_deal(f"deal_{i:06d}")
+    d["broker"]["brokerFirmName"] = f"Broker {i % 50}"
+    d["applicant"]["legalName"] = f"Applicant {i} Vehicle Hire Ltd"
+    d["applicant"]["companyNumber"] = f"{i:08d}"
+    d["applicant"]["registeredAddress"]["postcode"] = "SW1A 1AA"
+    d["controllers"]["directors"][0]["fullName"] = f"Director {i}"
+    d["facility"]["totalAmountRequested"]["amount"] = float(50_000 + i % 1000 * 250)
+    batches = d["assets"]["batches"]
+    for n in range(1, 1 + i % 3):
+        b = dict(batches[0], batchRef=f"BATCH-{n + 1}", newOrUsed="used", avgVehicleAgeMonths=24)
+        b["avgUnitPrice"] = {"amount": 18_500.0, "currency": "GBP"}
+        b["totalPrice"] = {"amount": 18_500.0 * 4, "currency": "GBP"}
+        batches.append(b)
+    return d
+
+
+def _measure(build: Callable[[], List[Any]]) -> Tuple[List[Any], float, int]:
+    # Timed without tracemalloc (it slows allocation), then rebuilt under it.
+    gc.collect()
+    t0 = time.perf_counter()
+    out = build()
+    elapsed = time.perf_counter() - t0
+    del out
+    gc.collect()
+    tracemalloc.start()
+    out = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, elapsed, size
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=100_000, help="number of deals (default 100000)")
+    args = parser.parse_args(argv)
+
+    docs = [json.dumps(sample_deal(i)) for i in range(args.n)]
+
+    dicts, t_dict, m_dict = _measure(lambda: [json.loads(s) for s in docs])
+    del dicts
+    models, t_model, m_model = _measure(lambda: [Deal.from_dict(json.loads(s)) for s in docs])
+
+    assert models[0].to_dict() == json.loads(docs[0])
+
+    print(f"{args.n} deals")
+    print(f"{'form':<8}{'load s':>10}{'us/deal':>10}{'bytes/deal':>12}")
+    print(f"{'dict':<8}{t_dict:>10.2f}{t_dict / args.n * 1e6:>10.1f}{m_dict // args.n:>12,}")
+    print(f"{'model':<8}{t_model:>10.2f}{t_model / args.n * 1e6:>10.1f}{m_model // args.n:>12,}")
+    print(f"memory saved: {1 - m_model / m_dict:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,49 @@
+"""
+Portfolio totals: per-save delta cost and dashboard read time.
+
+    python -m benchmarks.bench_portfolio [--n 50000]
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from benchmarks.bench_models import sample_deal
+from core import evaluate_rules
+from portfolio import PORTFOLIO_FILENAME, Portfolio
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=50_000, help="number of deals (default 50000)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        portfolio = Portfolio(Path(tmp) / PORTFOLIO_FILENAME)
+        deals = []
+        for i in range(args.n):
+            app = sample_deal(i)
+            app["assets"]["batches"][0]["supplierName"] = f"Supplier {i % 500}"
+            deals.append((f"deal_{i:06d}", app, evaluate_rules(app)))
+
+        t0 = time.perf_counter()
+        for ref, app, rr in deals:
+            portfolio.record(ref, app, rr)
+        t_save = (time.perf_counter() - t0) / args.n
+
+        t0 = time.perf_counter()
+        totals = Portfolio(Path(tmp) / PORTFOLIO_FILENAME).totals()
+        t_open = time.perf_counter() - t0
+
+    assert totals["deals"] == args.n
+    print(f"{args.n} deals")
+    print(f"save delta: {t_save * 1000:.2f} ms/save")
+    print(f"dashboard totals read: {t_open * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,40 @@
+"""
+Deal encode/decode time and size per serialization backend.
+
+    python -m benchmarks.bench_serializers [--n 10000]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import List
+
+import serializers
+from benchmarks.bench_models import sample_deal
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=10_000, help="number of deals (default 10000)")
+    args = parser.parse_args(argv)
+
+    deals = [sample_deal(i) for i in range(args.n)]
+    print(f"{args.n} deals")
+    print(f"{'format':<10}{'dump us':>10}{'load us':>10}{'bytes':>10}")
+    for name, ser in serializers.SERIALIZERS.items():
+        if not ser.available:
+            print(f"{name:<10}{'(not installed)':>30}")
+            continue
+        t0 = time.perf_counter()
+        blobs = [ser.dumps(d) for d in deals]
+        t1 = time.perf_counter()
+        loaded = [serializers.loads(b) for b in blobs]
+        t2 = time.perf_counter()
+        assert loaded[-1] == deals[-1]
+        size = sum(len(b) for b in blobs) // args.n
+        print(f"{name:<10}{(t1 - t0) / args.n * 1e6:>10.1f}{(t2 - t1) / args.n * 1e6:>10.1f}{size:>10,}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
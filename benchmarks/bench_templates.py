@@ -0,0 +1,39 @@
+"""
+Batch template rendering time, with and without rule evaluation.
+
+    python -m benchmarks.bench_templates [--n 10000]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import List
+
+from benchmarks.bench_models import sample_deal
+from core import evaluate_rules
+from templates import TEMPLATES, render_many
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=10_000, help="number of deals (default 10000)")
+    args = parser.parse_args(argv)
+
+    deals = [(f"deal_{i:06d}", sample_deal(i)) for i in range(args.n)]
+    scored = [(ref, app, evaluate_rules(app)) for ref, app in deals]
+
+    print(f"{args.n} deals")
+    for name in sorted(TEMPLATES):
+        t0 = time.perf_counter()
+        n = sum(1 for _ in render_many(name, ((ref, app, None) for ref, app in deals)))
+        t_eval = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        sum(1 for _ in render_many(name, scored))
+        t_render = time.perf_counter() - t0
+        assert n == args.n
+        print(f"{name:<20} with rules {t_eval:6.2f} s   render only {t_render:6.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import csv
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from postcodes import normalise_postcode
+
+_COMPANY_NUMBER_RE = re.compile(r"^(?:[0-9]{8}|[A-Z]{2}[0-9]{6}|R[0-9]{7})$")
+_PREFIX_RE = re.compile(r"^([A-Z]{1,2})([0-9]+)$")
+_NAME_STRIP_RE = re.compile(r"[^A-Z0-9 ]")
+_NAME_SUFFIXES = {
+    "LIMITED": "LTD",
+    "PUBLIC LIMITED COMPANY": "PLC",
+    "LIMITED LIABILITY PARTNERSHIP": "LLP",
+}
+
+_BATCH_ROWS = 10_000
+
+_SCHEMA = """
+CREATE TABLE companies (
+    company_number TEXT PRIMARY KEY,
+    legal_name TEXT NOT NULL,
+    status TEXT,
+    category TEXT,
+    incorporation_date TEXT,
+    sic_codes TEXT,
+    line1 TEXT,
+    line2 TEXT,
+    town_city TEXT,
+    county TEXT,
+    postcode TEXT,
+    country TEXT
+) WITHOUT ROWID
+"""
+
+_COLUMNS = (
+    "company_number", "legal_name", "status", "category", "incorporation_date", "sic_codes",
+    "line1", "line2", "town_city", "county", "postcode", "country",
+)
+
+
+def normalise_company_number(raw: Any) -> Optional[str]:
+    """
+    Returns the 8-character Companies House number (zero-padded, with any
+    SC/NI/OC/... prefix kept), or None if it is not well-formed.
+    """
+    if raw is None:
+        return None
+    s = re.sub(r"\s", "", str(raw)).upper()
+    if s.isdigit() and len(s) <= 8:
+        s = s.zfill(8)
+    else:
+        m = _PREFIX_RE.match(s)
+        if m and len(s) <= 8:
+            s = m.group(1) + m.group(2).zfill(8 - len(m.group(1)))
+    return s if _COMPANY_NUMBER_RE.match(s) else None
+
+
+def _iso_date(raw: str) -> str:
+    raw = (raw or "").strip()
+    if not raw:
+        return ""
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(raw, fmt).date().isoformat()
+        except ValueError:
+            pass
+    return ""
+
+
+def _name_key(name: Any) -> str:
+    s = " ".join(_NAME_STRIP_RE.sub(" ", str(name or "").upper()).split())
+    for long, short in _NAME_SUFFIXES.items():
+        if s.endswith(" " + long):
+            s = s[: -len(long)] + short
+    return s
+
+
+@dataclass
+class CompanyRecord:
+    company_number: str
+    legal_name: str
+    status: str = ""
+    category: str = ""
+    incorporation_date: str = ""
+    sic_codes: List[str] = field(default_factory=list)
+    registered_address: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def is_active(self) -> bool:
+        return self.status.lower() == "active"
+
+
+def _record_from_row(row: Tuple) -> CompanyRecord:
+    (number, name, status, category, inc, sics, line1, line2, town, county, postcode, country) = row
+    return CompanyRecord(
+        company_number=number,
+        legal_name=name,
+        status=status or "",
+        category=category or "",
+        incorporation_date=inc or "",
+        sic_codes=[s for s in (sics or "").split("|") if s],
+        registered_address={
+            "line1": line1 or "",
+            "line2": line2 or "",
+            "townCity": town or "",
+            "county": county or "",
+            "postcode": postcode or "",
+            "country": country or "",
+        },
+    )
+
+
+class CompanyRegister:
+    """
+    Read-only view of a company register snapshot built by build_register().
+    Safe to share between threads (e.g. Streamlit sessions).
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(self.path)
+        import sqlite3
+
+        self._conn = sqlite3.connect(
+            f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "CompanyRegister":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def lookup(self, company_number: Any) -> Optional[CompanyRecord]:
+        number = normalise_company_number(company_number)
+        if number is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM companies WHERE company_number = ?", (number,)
+            ).fetchone()
+        return _record_from_row(row) if row else None
+
+
+def _iter_snapshot_rows(csv_path: str | os.PathLike) -> Iterator[Tuple]:
+    with open(csv_path, newline="", encoding="utf-8-sig", errors="replace") as fh:
+        reader = csv.reader(fh)
+        header = [h.strip() for h in next(reader, [])]
+        col = {h: i for i, h in enumerate(header)}
+        if "CompanyNumber" not in col or "CompanyName" not in col:
+            raise ValueError(f"{csv_path}: not a company register snapshot (no CompanyNumber/CompanyName columns)")
+        sic_cols = [col[h] for h in header if h.startswith("SICCode.SicText_")]
+
+        def get(row: List[str], name: str) -> str:
+            i = col.get(name)
+            return row[i].strip() if i is not None and i < len(row) else ""
+
+        for row in reader:
+            number = normalise_company_number(get(row, "CompanyNumber"))
+            if number is None:
+                continue
+            sics = []
+            for i in sic_cols:
+                code = row[i].split(" - ", 1)[0].strip() if i < len(row) else ""
+                if code.isdigit():
+                    sics.append(code)
+            postcode = get(row, "RegAddress.PostCode")
+            yield (
+                number,
+                get(row, "CompanyName"),
+                get(row, "CompanyStatus"),
+                get(row, "CompanyCategory"),
+                _iso_date(get(row, "IncorporationDate")),
+                "|".join(sics),
+                get(row, "RegAddress.AddressLine1"),
+                get(row, "RegAddress.AddressLine2"),
+                get(row, "RegAddress.PostTown"),
+                get(row, "RegAddress.County"),
+                normalise_postcode(postcode) or postcode,
+                get(row, "RegAddress.Country"),
+            )
+
+
+def build_register(csv_path: str | os.PathLike, out_path: str | os.PathLike) -> int:
+    """
+    Streams a Companies House "basic company data" CSV into an indexed SQLite
+    store for CompanyRegister. Rows are inserted in fixed-size batches, so
+    memory stays bounded regardless of file size. Returns the row count.
+    """
+    import sqlite3
+
+    out_path = Path(out_path)
+    tmp_path = out_path.with_suffix(out_path.suffix + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute(_SCHEMA)
+        insert = f"INSERT OR REPLACE INTO companies ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+        count = 0
+        batch: List[Tuple] = []
+        for row in _iter_snapshot_rows(csv_path):
+            batch.append(row)
+            if len(batch) >= _BATCH_ROWS:
+                conn.executemany(insert, batch)
+                count += len(batch)
+                batch.clear()
+        if batch:
+            conn.executemany(insert, batch)
+            count += len(batch)
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, out_path)
+    return count
+
+
+def prefill_applicant(applicant: Dict[str, Any], rec: CompanyRecord) -> None:
+    """
+    Copies register details into an applicant dict (deal JSON shape).
+    """
+    applicant["companyNumber"] = rec.company_number
+    applicant["legalName"] = rec.legal_name
+    if rec.incorporation_date:
+        applicant["incorporationDate"] = rec.incorporation_date
+    if rec.sic_codes:
+        applicant["sicCodes"] = list(rec.sic_codes)
+    ra = applicant.setdefault("registeredAddress", {})
+    for k, v in rec.registered_address.items():
+        if v:
+            ra[k] = v
+
+
+def register_mismatches(applicant: Dict[str, Any], rec: CompanyRecord) -> List[str]:
+    """
+    Lists differences between what the broker entered and the register snapshot.
+    """
+    out: List[str] = []
+    if not rec.is_active:
+        out.append(f"Company register: {rec.company_number} status is '{rec.status}', not Active.")
+    name = applicant.get("legalName")
+    if name and _name_key(name) != _name_key(rec.legal_name):
+        out.append(f"Company register: legal name '{name}' does not match register name '{rec.legal_name}'.")
+    inc = applicant.get("incorporationDate")
+    if inc and rec.incorporation_date and str(inc) != rec.incorporation_date:
+        out.append(f"Company register: incorporation date {inc} does not match register date {rec.incorporation_date}.")
+    pc = (applicant.get("registeredAddress") or {}).get("postcode")
+    reg_pc = rec.registered_address.get("postcode")
+    if pc and reg_pc and (normalise_postcode(pc) or pc) != (normalise_postcode(reg_pc) or reg_pc):
+        out.append(f"Company register: registered postcode {pc} does not match register postcode {reg_pc}.")
+    is_llp = "limited liability partnership" in rec.category.lower()
+    structure = applicant.get("legalStructure")
+    if rec.category and ((structure == "llp") != is_llp):
+        out.append(f"Company register: legal structure '{structure}' does not match register category '{rec.category}'.")
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local company register snapshot index.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Import a Companies House basic company data CSV.")
+    b.add_argument("csv_path")
+    b.add_argument("out_path")
+    q = sub.add_parser("lookup", help="Look up one or more company numbers.")
+    q.add_argument("register_path")
+    q.add_argument("company_numbers", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "build":
+        n = build_register(args.csv_path, args.out_path)
+        print(f"Imported {n} companies into {args.out_path}")
+        return 0
+
+    with CompanyRegister(args.register_path) as reg:
+        for raw in args.company_numbers:
+            rec = reg.lookup(raw)
+            if rec is None:
+                print(f"{raw}\tunknown")
+            else:
+                print(f"{raw}\t{rec.company_number}\t{rec.legal_name}\t{rec.status}\t{rec.incorporation_date}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,8 +2,16 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date, datetime
-from typing import Any, Dict, List, Optional, Tuple
-from dateutil.relativedelta import relativedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+from companies import normalise_company_number, register_mismatches
+from models import as_dict
+from postcodes import normalise_postcode
+
+if TYPE_CHECKING:
+    from companies import CompanyRegister
+    from models import Deal
+    from postcodes import PostcodeIndex
 
 
 def _months_old(d: Optional[date]) -> Optional[int]:
@@ -12,6 +20,8 @@ def _months_old(d: Optional[date]) -> Optional[int]:
     today = date.today()
     if d > today:
         return 0
+    from dateutil.relativedelta import relativedelta
+
     rd = relativedelta(today, d)
     return rd.years * 12 + rd.months
 
@@ -24,11 +34,21 @@ class RuleResult:
     suggestions: List[str]
 
 
-def evaluate_rules(app: Dict[str, Any]) -> RuleResult:
+def evaluate_rules(
+    app: Union[Dict[str, Any], "Deal"],
+    postcodes: Optional["PostcodeIndex"] = None,
+    companies: Optional["CompanyRegister"] = None,
+) -> RuleResult:
     """
     Simple v1 rules engine for UK vehicle hire asset finance packaging.
     It does NOT make a credit decision; it checks pack readiness and flags.
+    If reference data is given (postcode index, company register snapshot),
+    postcodes and company details are also checked against it.
+    Accepts the deal either as its JSON dict or as a models.Deal; a Deal is
+    converted to the dict shape first (see models.as_dict), so scoring many
+    in-memory models pays a full to_dict per deal.
     """
+    app = as_dict(app)
     missing: List[str] = []
     required_now: List[str] = []
     flags: List[str] = []
@@ -120,6 +140,36 @@ def evaluate_rules(app: Dict[str, Any]) -> RuleResult:
         if v is None or v == "":
             missing.append(p)
 
+    postcode_fields: List[Tuple[str, str]] = []
+    reg_pc = get("applicant.registeredAddress.postcode")
+    if reg_pc:
+        postcode_fields.append(("applicant.registeredAddress.postcode", reg_pc))
+    for i, d in enumerate(directors if isinstance(directors, list) else []):
+        if d.get("homePostcode"):
+            postcode_fields.append((f"controllers.directors[{i}].homePostcode", d["homePostcode"]))
+
+    known = postcodes.lookup_many(v for _, v in postcode_fields if isinstance(v, str)) if postcodes is not None else {}
+    for field, v in postcode_fields:
+        if normalise_postcode(v) is None:
+            required_now.append(f"{field} (not a valid UK postcode: {v!r})")
+        elif postcodes is not None:
+            match = known.get(v)
+            if match is None:
+                required_now.append(f"{field} (not found in postcode reference: {v!r})")
+            elif match.terminated:
+                required_now.append(f"{field} (terminated postcode: {v!r})")
+
+    company_number = get("applicant.companyNumber")
+    if legal_structure in ("limited_company", "llp") and company_number:
+        if normalise_company_number(company_number) is None:
+            required_now.append(f"applicant.companyNumber (not a valid company number: {company_number!r})")
+        elif companies is not None:
+            rec = companies.lookup(company_number)
+            if rec is None:
+                required_now.append(f"applicant.companyNumber (not found in company register: {company_number!r})")
+            else:
+                flags.extend(register_mismatches(get("applicant", {}), rec))
+
     years_trading = get("applicant.yearsTrading", 0) or 0
     try:
         years_trading_num = float(years_trading)
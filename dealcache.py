@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from serializers import Version, bump_version, deal_lock, deal_path, read, save_deal, store_version
+
+_MISSING = object()
+
+
+def copy_tree(v: Any) -> Any:
+    """Deep copy for JSON-shaped data; much cheaper than copy.deepcopy."""
+    if isinstance(v, dict):
+        return {k: copy_tree(x) for k, x in v.items()}
+    if isinstance(v, list):
+        return [copy_tree(x) for x in v]
+    return v
+
+
+class DealConflict(Exception):
+    """Raised by DealCache.save when the deal changed since it was loaded."""
+
+    def __init__(self, deal_ref: str, theirs: Optional[Dict[str, Any]], version: Optional[Version]):
+        super().__init__(f"Deal {deal_ref} was changed by someone else since it was loaded.")
+        self.deal_ref = deal_ref
+        self.theirs = theirs
+        self.version = version
+
+
+@dataclass
+class _Entry:
+    version: Version
+    data: Dict[str, Any]
+
+
+class DealCache:
+    """
+    Process-wide cache of parsed deals, shared by all sessions.
+
+    Entries are keyed by deal reference and invalidated when the deal's store
+    version changes: its save counter or the file itself (see store_version),
+    so saves by other processes and edits by other tools are both picked up. Callers
+    always get their own copy. Saves are compare-and-swap against the version
+    the caller loaded, under a lock that holds across processes.
+    """
+
+    def __init__(self, data_dir: Path, max_entries: int = 256):
+        self.data_dir = Path(data_dir)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._deal_locks: Dict[str, threading.Lock] = {}
+
+    def _deal_lock(self, deal_ref: str) -> threading.Lock:
+        with self._lock:
+            return self._deal_locks.setdefault(deal_ref, threading.Lock())
+
+    def _put(self, deal_ref: str, entry: _Entry) -> None:
+        with self._lock:
+            self._entries[deal_ref] = entry
+            self._entries.move_to_end(deal_ref)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get(self, deal_ref: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(deal_ref)
+            if entry is not None:
+                self._entries.move_to_end(deal_ref)
+            return entry
+
+    def version(self, deal_ref: str) -> Optional[Version]:
+        return store_version(self.data_dir, deal_ref)
+
+    def load(self, deal_ref: str) -> Tuple[Optional[Dict[str, Any]], Optional[Version]]:
+        """
+        Returns (a private copy of the deal, its version), or (None, None) if
+        it has not been saved. Parses the file only if the cached copy is stale.
+        """
+        version = self.version(deal_ref)
+        if version is None:
+            return None, None
+        entry = self._get(deal_ref)
+        if entry is None or entry.version != version:
+            with self._deal_lock(deal_ref), deal_lock(self.data_dir, deal_ref, shared=True):
+                entry = self._get(deal_ref)
+                version = self.version(deal_ref)
+                if version is None:
+                    return None, None
+                if entry is None or entry.version != version:
+                    entry = _Entry(version, read(deal_path(self.data_dir, deal_ref)))
+                    self._put(deal_ref, entry)
+        return copy_tree(entry.data), entry.version
+
+    def save(self, deal_ref: str, app: Dict[str, Any], expected_version: Optional[Version]) -> Version:
+        """
+        Saves the deal if its current version is still `expected_version`
+        (None: it must not exist yet). Raises DealConflict otherwise, carrying
+        the current saved copy. Returns the new version.
+        """
+        with self._deal_lock(deal_ref), deal_lock(self.data_dir, deal_ref):
+            current = self.version(deal_ref)
+            if current != expected_version:
+                theirs = read(deal_path(self.data_dir, deal_ref)) if current is not None else None
+                raise DealConflict(deal_ref, theirs, current)
+            save_deal(self.data_dir, deal_ref, app)
+            bump_version(self.data_dir, deal_ref)
+            version = self.version(deal_ref)
+            self._put(deal_ref, _Entry(version, copy_tree(app)))
+            return version
+
+
+def merge_deals(base: Any, mine: Any, theirs: Any, path: str = "") -> Tuple[Any, List[str]]:
+    """
+    Three-way merge of two edits of the same deal. Changes on only one side
+    are kept; fields both sides changed differently are conflicts, resolved in
+    favour of `mine`. Lists are merged as whole values. Returns
+    (merged, conflicting field paths).
+    """
+    if mine == theirs:
+        return copy_tree(mine), []
+    if base == mine:
+        return copy_tree(theirs), []
+    if base == theirs:
+        return copy_tree(mine), []
+    if isinstance(mine, dict) and isinstance(theirs, dict):
+        base_d = base if isinstance(base, dict) else {}
+        merged: Dict[str, Any] = {}
+        conflicts: List[str] = []
+        for k in list(mine) + [k for k in theirs if k not in mine]:
+            m = mine.get(k, _MISSING)
+            t = theirs.get(k, _MISSING)
+            b = base_d.get(k, _MISSING)
+            v, c = merge_deals(b, m, t, f"{path}.{k}" if path else k)
+            if v is not _MISSING:
+                merged[k] = v
+            conflicts.extend(c)
+        return merged, conflicts
+    return copy_tree(mine), [path]
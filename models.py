@@ -0,0 +1,426 @@
+from __future__ import annotations
+
+import sys
+import typing
+from dataclasses import dataclass, field, fields
+from datetime import date
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+class _Missing:
+    """Marks a field that was absent from the source dict (as opposed to null)."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+    def __bool__(self) -> bool:
+        return False
+
+
+MISSING: Any = _Missing()
+
+
+def _camel(name: str) -> str:
+    head, *rest = name.split("_")
+    return head + "".join(p[:1].upper() + p[1:] for p in rest)
+
+
+def _is_money(v: Any) -> bool:
+    return (
+        isinstance(v, dict)
+        and len(v) == 2
+        and "amount" in v
+        and "currency" in v
+        and not isinstance(v["amount"], (dict, list))
+    )
+
+
+def _pack(v: Any) -> Any:
+    if isinstance(v, dict):
+        if _is_money(v):
+            return Money.from_dict(v)
+        return {sys.intern(k) if isinstance(k, str) else k: _pack(x) for k, x in v.items()}
+    if isinstance(v, list):
+        return [_pack(x) for x in v]
+    return v
+
+
+def _unpack(v: Any) -> Any:
+    if isinstance(v, (Money, _Model)):
+        return v.to_dict()
+    if isinstance(v, dict):
+        return {k: _unpack(x) for k, x in v.items()}
+    if isinstance(v, list):
+        return [_unpack(x) for x in v]
+    return v
+
+
+@dataclass(slots=True)
+class Money:
+    amount: Any = 0
+    currency: str = "GBP"
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Money":
+        cur = d.get("currency")
+        return cls(d.get("amount"), sys.intern(cur) if isinstance(cur, str) else cur)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"amount": self.amount, "currency": self.currency}
+
+
+# Distinct out-of-order key sequences, shared by every model that has one.
+_KEY_ORDERS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+# Field kinds used by the (de)serialiser.
+_PLAIN, _MONEY, _MODEL, _MODEL_LIST = range(4)
+
+
+@dataclass(slots=True)
+class _Model:
+    """
+    Base for the typed deal model. Each subclass declares the JSON keys it
+    knows about as snake_case fields (mapped to camelCase keys); anything else
+    is kept in `extra`, so from_dict/to_dict round-trip without loss. Absent
+    keys stay MISSING and are omitted again by to_dict. If the source keys
+    were not in declared order (or extra keys came before declared ones),
+    `key_order` keeps the original sequence so to_dict reproduces it.
+    """
+
+    extra: Optional[Dict[str, Any]] = None
+    key_order: Optional[Tuple[str, ...]] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]):
+        spec = _spec(cls)
+        kw: Dict[str, Any] = {}
+        extra: Optional[Dict[str, Any]] = None
+        in_order, last = True, -1
+        for k, v in d.items():
+            s = spec.get(k)
+            if s is None:
+                if extra is None:
+                    extra = {}
+                extra[sys.intern(k)] = _pack(v)
+                continue
+            attr, kind, sub, pos = s
+            if extra is not None or pos < last:
+                in_order = False
+            last = pos
+            if kind == _MONEY and _is_money(v):
+                v = Money.from_dict(v)
+            elif kind == _MODEL and isinstance(v, dict):
+                v = sub.from_dict(v)
+            elif kind == _MODEL_LIST and isinstance(v, list):
+                v = [sub.from_dict(x) if isinstance(x, dict) else _pack(x) for x in v]
+            else:
+                v = _pack(v)
+            kw[attr] = v
+        obj = cls(**kw)
+        obj.extra = extra
+        if not in_order:
+            keys = tuple(d)
+            obj.key_order = _KEY_ORDERS.setdefault(keys, keys)
+        return obj
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for key, (attr, _, _, _) in _spec(type(self)).items():
+            v = getattr(self, attr)
+            if v is not MISSING:
+                out[key] = _unpack(v)
+        if self.extra:
+            for k, v in self.extra.items():
+                out[k] = _unpack(v)
+        if self.key_order:
+            # Keys set since loading follow the original ones.
+            out = {**{k: out.pop(k) for k in self.key_order if k in out}, **out}
+        return out
+
+
+@lru_cache(maxsize=None)
+def _spec(cls: type) -> Dict[str, Tuple[str, int, Optional[type], int]]:
+    """JSON key -> (attribute, field kind, nested model, declared position)."""
+    hints = typing.get_type_hints(cls)
+    out: Dict[str, Tuple[str, int, Optional[type], int]] = {}
+    for f in fields(cls):
+        if f.name in ("extra", "key_order"):
+            continue
+        hint = hints[f.name]
+        args = typing.get_args(hint)
+        if hint is Money:
+            kind, sub = _MONEY, None
+        elif isinstance(hint, type) and issubclass(hint, _Model):
+            kind, sub = _MODEL, hint
+        elif typing.get_origin(hint) is list and args and isinstance(args[0], type) and issubclass(args[0], _Model):
+            kind, sub = _MODEL_LIST, args[0]
+        else:
+            kind, sub = _PLAIN, None
+        out[_camel(f.name)] = (f.name, kind, sub, len(out))
+    return out
+
+
+@dataclass(slots=True)
+class Director(_Model):
+    full_name: Any = MISSING
+    dob: Any = MISSING
+    home_postcode: Any = MISSING
+    home_address: Any = MISSING
+    role: Any = MISSING
+    ownership_percent: Any = MISSING
+    is_primary_guarantor: Any = MISSING
+
+
+@dataclass(slots=True)
+class Supplier(_Model):
+    supplier_name: Any = MISSING
+    supplier_type: Any = MISSING
+    contact_name: Any = MISSING
+    contact_email: Any = MISSING
+    contact_phone: Any = MISSING
+    address: Any = MISSING
+
+
+@dataclass(slots=True)
+class Batch(_Model):
+    batch_ref: Any = MISSING
+    vehicle_type: Any = MISSING
+    new_or_used: Any = MISSING
+    quantity: Any = MISSING
+    avg_unit_price: Money = MISSING
+    total_price: Money = MISSING
+    avg_vehicle_age_months: Any = MISSING
+    mileage_range: Any = MISSING
+    make_model_known: Any = MISSING
+    make: Any = MISSING
+    model: Any = MISSING
+    fuel_type: Any = MISSING
+    supplier_name: Any = MISSING
+    quote_reference: Any = MISSING
+    expected_delivery_date: Any = MISSING
+    security_notes: Any = MISSING
+
+
+@dataclass(slots=True)
+class Applicant(_Model):
+    legal_name: Any = MISSING
+    trading_name: Any = MISSING
+    legal_structure: Any = MISSING
+    company_number: Any = MISSING
+    utr: Any = MISSING
+    vat_registered: Any = MISSING
+    vat_number: Any = MISSING
+    incorporation_date: Any = MISSING
+    years_trading: Any = MISSING
+    sic_codes: Any = MISSING
+    registered_address: Any = MISSING
+    trading_addresses: Any = MISSING
+    primary_contact: Any = MISSING
+    banking: Any = MISSING
+    industry: Any = MISSING
+
+
+@dataclass(slots=True)
+class Controllers(_Model):
+    directors: List[Director] = MISSING
+    group_structure: Any = MISSING
+    guarantees: Any = MISSING
+
+
+@dataclass(slots=True)
+class Facility(_Model):
+    finance_purpose: Any = MISSING
+    product_type: Any = MISSING
+    repayment_profile: Any = MISSING
+    term_months: Any = MISSING
+    deposit: Money = MISSING
+    balloon_or_residual: Money = MISSING
+    total_amount_requested: Money = MISSING
+    vat_treatment: Any = MISSING
+    speed_requirement: Any = MISSING
+    preferred_payment_day: Any = MISSING
+
+
+@dataclass(slots=True)
+class Assets(_Model):
+    batches: List[Batch] = MISSING
+    suppliers: List[Supplier] = MISSING
+
+
+@dataclass(slots=True)
+class Deal(_Model):
+    broker: Any = MISSING
+    applicant: Applicant = MISSING
+    controllers: Controllers = MISSING
+    facility: Facility = MISSING
+    assets: Assets = MISSING
+    financials: Any = MISSING
+    fleet_ops: Any = MISSING
+    risk: Any = MISSING
+    consents: Any = MISSING
+
+
+def as_dict(app: Union[Dict[str, Any], Deal]) -> Dict[str, Any]:
+    """
+    Returns the deal in its JSON (nested dict) shape. A Deal is converted in
+    full (Deal.to_dict builds a new dict tree), so callers taking either form
+    pay that per call for models; dicts are returned as is.
+    """
+    return app if isinstance(app, dict) else app.to_dict()
+
+
+def as_model(app: Union[Dict[str, Any], Deal]) -> Deal:
+    """Returns the deal as a typed Deal."""
+    return app if isinstance(app, Deal) else Deal.from_dict(app)
+
+
+def new_deal(deal_ref: str) -> Dict[str, Any]:
+    """Blank deal in the JSON shape used by the intake form."""
+    return {
+        "broker": {
+            "brokerFirmName": "",
+            "brokerContactName": "",
+            "brokerContactEmail": "",
+            "brokerContactPhone": "",
+            "internalDealRef": deal_ref,
+            "targetLenderProfiles": [],
+            "notesInternal": "",
+        },
+        "applicant": {
+            "legalName": "",
+            "tradingName": "",
+            "legalStructure": "limited_company",
+            "companyNumber": "",
+            "utr": "",
+            "vatRegistered": True,
+            "vatNumber": "",
+            "incorporationDate": str(date.today()),
+            "yearsTrading": 3,
+            "sicCodes": [],
+            "registeredAddress": {
+                "line1": "",
+                "line2": "",
+                "townCity": "",
+                "county": "",
+                "postcode": "",
+                "country": "UK",
+            },
+            "tradingAddresses": [],
+            "primaryContact": {"name": "", "roleTitle": "", "email": "", "phone": ""},
+            "banking": {"primaryBankName": ""},
+            "industry": {"isVehicleHire": True, "subSector": "mixed"},
+        },
+        "controllers": {
+            "directors": [
+                {
+                    "fullName": "",
+                    "dob": "1980-01-01",
+                    "homePostcode": "",
+                    "homeAddress": None,
+                    "role": "director",
+                    "ownershipPercent": 0,
+                    "isPrimaryGuarantor": True,
+                }
+            ],
+            "shareholdersOrPSCs": [],
+            "groupStructure": {"isGroup": False, "parentCompanyName": ""},
+            "guarantees": {
+                "personalGuaranteeExpected": "unknown",
+                "pgType": "limited",
+                "guarantors": [],
+            },
+        },
+        "facility": {
+            "financePurpose": "growth",
+            "productType": "hire_purchase",
+            "repaymentProfile": "monthly",
+            "termMonths": 48,
+            "deposit": {"amount": 0, "currency": "GBP"},
+            "balloonOrResidual": {"amount": 0, "currency": "GBP"},
+            "totalAmountRequested": {"amount": 0, "currency": "GBP"},
+            "vatTreatment": "vat_on_purchase_reclaimable",
+            "speedRequirement": "standard",
+            "preferredPaymentDay": 1,
+        },
+        "assets": {
+            "batches": [
+                {
+                    "batchRef": "BATCH-1",
+                    "vehicleType": "van",
+                    "newOrUsed": "new",
+                    "quantity": 1,
+                    "avgUnitPrice": {"amount": 0, "currency": "GBP"},
+                    "totalPrice": {"amount": 0, "currency": "GBP"},
+                    "avgVehicleAgeMonths": None,
+                    "mileageRange": None,
+                    "makeModelKnown": False,
+                    "make": "",
+                    "model": "",
+                    "fuelType": "diesel",
+                    "supplierName": "",
+                    "quoteReference": "",
+                    "expectedDeliveryDate": "",
+                    "securityNotes": "",
+                }
+            ],
+            "suppliers": [
+                {
+                    "supplierName": "",
+                    "supplierType": "independent_dealer",
+                    "contactName": "",
+                    "contactEmail": "",
+                    "contactPhone": "",
+                    "address": None,
+                }
+            ],
+        },
+        "financials": {
+            "accounts": {
+                "lastFiledYearEnd": "",
+                "turnover": {"amount": 0, "currency": "GBP"},
+                "ebitda": {"amount": 0, "currency": "GBP"},
+                "netProfit": {"amount": 0, "currency": "GBP"},
+                "netAssets": {"amount": 0, "currency": "GBP"},
+                "totalBorrowings": {"amount": 0, "currency": "GBP"},
+            },
+            "managementAccounts": {
+                "periodEnd": "",
+                "ytdTurnover": {"amount": 0, "currency": "GBP"},
+                "ytdEbitda": {"amount": 0, "currency": "GBP"},
+                "lastMonthTurnover": {"amount": 0, "currency": "GBP"},
+                "lastMonthEbitda": {"amount": 0, "currency": "GBP"},
+            },
+            "bankingEvidence": {
+                "statementsMonthsProvided": 0,
+                "avgMonthlyCredits": {"amount": 0, "currency": "GBP"},
+                "avgMonthlyDebits": {"amount": 0, "currency": "GBP"},
+                "minMonthEndBalance": {"amount": 0, "currency": "GBP"},
+            },
+            "existingDebt": {
+                "monthlyFinanceCommitments": {"amount": 0, "currency": "GBP"},
+                "fleetFinanceCommitments": {"amount": 0, "currency": "GBP"},
+                "otherDebtCommitments": {"amount": 0, "currency": "GBP"},
+            },
+        },
+        "fleetOps": {
+            "fleetSizeTotal": 0,
+            "fleetOwned": 0,
+            "fleetLeasedOrFinanced": 0,
+            "avgUtilisationPercent": 0,
+            "avgRevenuePerVehiclePerMonth": {"amount": 0, "currency": "GBP"},
+            "avgMaintenanceCostPerVehiclePerMonth": {"amount": 0, "currency": "GBP"},
+            "customerConcentrationPercentTop1": "",
+            "customerConcentrationPercentTop5": "",
+            "contractCoverageNarrative": "",
+        },
+        "risk": {
+            "hasCCJsOrInsolvency": "unknown",
+            "anyLateTaxOrVAT": "unknown",
+            "adverseTradingEvents": [],
+            "brokerNarrative": "",
+        },
+        "consents": {"hasAuthorityToShareData": False, "dataProcessingConsent": False},
+    }
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import streamlit as st
+
+from portfolio import DIMENSIONS, PORTFOLIO_FILENAME, Portfolio, top_flags
+
+DATA_DIR = Path("data")
+DATA_DIR.mkdir(exist_ok=True)
+
+DIMENSION_LABELS = {
+    "productType": "Product type (requested amount)",
+    "vehicleType": "Vehicle type (batch value)",
+    "newOrUsed": "New / used (batch value)",
+    "supplier": "Supplier (batch value)",
+}
+
+st.set_page_config(page_title="Portfolio dashboard", layout="wide")
+st.title("Portfolio dashboard")
+st.caption("Readiness and exposure across all saved deals, updated on every Save.")
+
+
+@st.cache_resource
+def get_portfolio():
+    return Portfolio(DATA_DIR / PORTFOLIO_FILENAME)
+
+
+totals = get_portfolio().totals()
+
+if not totals["deals"]:
+    st.info("No deals recorded yet. Save a deal, or backfill with: python portfolio.py rebuild data")
+    st.stop()
+
+c1, c2, c3, c4, c5 = st.columns(5)
+c1.metric("Deals", f"{totals['deals']:,}")
+c2.metric("Total requested", f"GBP {totals['requested']:,.0f}")
+for col, status in zip((c3, c4, c5), ("RED", "AMBER", "GREEN")):
+    col.metric(
+        status,
+        f"{totals['status'].get(status, 0):,}",
+        f"GBP {totals['requestedByStatus'].get(status, 0):,.0f}",
+        delta_color="off",
+    )
+
+st.divider()
+cols = st.columns(2)
+for i, dim in enumerate(DIMENSIONS):
+    with cols[i % 2]:
+        st.subheader(DIMENSION_LABELS[dim])
+        exposure = totals["dims"].get(dim, {})
+        rows = sorted(
+            ({dim: k, "amount (GBP)": v["amount"], "deals": v["deals"]} for k, v in exposure.items()),
+            key=lambda r: -r["amount (GBP)"],
+        )
+        st.dataframe(rows, hide_index=True)
+
+st.divider()
+st.subheader("Top flags")
+flags = top_flags(totals, 15)
+if flags:
+    st.dataframe([{"flag": f, "deals": n} for f, n in flags], hide_index=True)
+else:
+    st.write("—")
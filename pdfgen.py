@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import textwrap
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Union
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas
 
+from models import Deal, as_dict
 
-def _money(m: Dict[str, Any]) -> str:
+
+def _money(m: Any) -> str:
     if not isinstance(m, dict):
         return ""
     amt = m.get("amount")
@@ -25,10 +28,21 @@ def _safe(d: Any) -> str:
     return "" if d is None else str(d)
 
 
-def generate_credit_summary_pdf(app: Dict[str, Any], rules: Dict[str, Any], out_path: str) -> str:
+def generate_credit_summary_pdf(
+    app: Union[Dict[str, Any], Deal],
+    rules: Dict[str, Any],
+    out_path: str,
+    narrative: Optional[str] = None,
+    narrative_heading: str = "Funding narrative",
+) -> str:
     """
     Generates a clean 1–2 page lender-style credit summary PDF.
+    Accepts the deal either as its JSON dict or as a models.Deal (converted
+    to the dict shape first, see models.as_dict).
+    A rendered template (see templates.py) is appended under
+    `narrative_heading` if given.
     """
+    app = as_dict(app)
     c = canvas.Canvas(out_path, pagesize=A4)
     width, height = A4  # noqa: F841
 
@@ -41,14 +55,22 @@ def generate_credit_summary_pdf(app: Dict[str, Any], rules: Dict[str, Any], out_
         c.drawString(margin_x, y, text)
         y -= 8 * mm
 
+    def new_page_if_needed(space=25 * mm):
+        nonlocal y
+        if y < space:
+            c.showPage()
+            y = height - 18 * mm
+
     def h2(text):
         nonlocal y
+        new_page_if_needed(35 * mm)
         c.setFont("Helvetica-Bold", 11.5)
         c.drawString(margin_x, y, text)
         y -= 6 * mm
 
     def p(label, value):
         nonlocal y
+        new_page_if_needed()
         c.setFont("Helvetica-Bold", 9.5)
         c.drawString(margin_x, y, f"{label}:")
         c.setFont("Helvetica", 9.5)
@@ -90,4 +112,75 @@ def generate_credit_summary_pdf(app: Dict[str, Any], rules: Dict[str, Any], out_
     p("Legal structure", _safe(applicant.get("legalStructure")))
     p("Company number", _safe(applicant.get("companyNumber", "")))
     p("VAT", "Yes" if applicant.get("vatRegistered") else "No")
+    p("VAT number", _safe(applicant.get("vatNumber", "")))
+    p("Incorporated", _safe(applicant.get("incorporationDate", "")))
+    p("Years trading", _safe(applicant.get("yearsTrading")))
+    p("Registered postcode", _safe((applicant.get("registeredAddress") or {}).get("postcode", "")))
+    p("Sub-sector", _safe((applicant.get("industry") or {}).get("subSector", "")))
+    p("Broker", f"{_safe(broker.get('brokerFirmName'))} / {_safe(broker.get('brokerContactName'))}")
+    p("Deal reference", _safe(broker.get("internalDealRef")))
+    y -= 2 * mm
+
+    h2("Facility request")
+    p("Product", _safe(facility.get("productType")))
+    p("Purpose", _safe(facility.get("financePurpose")))
+    p("Term", f"{_safe(facility.get('termMonths'))} months")
+    p("Amount requested", _money(facility.get("totalAmountRequested")))
+    p("Deposit", _money(facility.get("deposit")))
+    p("Balloon / residual", _money(facility.get("balloonOrResidual")))
+    p("VAT treatment", _safe(facility.get("vatTreatment")))
+    y -= 2 * mm
+
+    h2("Assets")
+    for b in batches[:10]:
+        age = f", avg age {b.get('avgVehicleAgeMonths')}m" if b.get("newOrUsed") == "used" else ""
+        p(
+            _safe(b.get("batchRef")),
+            f"{_safe(b.get('quantity'))} x {_safe(b.get('newOrUsed'))} {_safe(b.get('vehicleType'))}{age} "
+            f"@ {_money(b.get('avgUnitPrice'))} = {_money(b.get('totalPrice'))} ({_safe(b.get('supplierName'))})",
+        )
+    y -= 2 * mm
+
+    h2("Fleet operations")
+    p("Fleet size", _safe(fleet.get("fleetSizeTotal")))
+    p("Utilisation", f"{_safe(fleet.get('avgUtilisationPercent'))}%")
+    p("Revenue / vehicle / month", _money(fleet.get("avgRevenuePerVehiclePerMonth")))
+    y -= 2 * mm
+
+    h2("Financials")
+    p("Last filed year-end", _safe(accounts.get("lastFiledYearEnd")))
+    p("Turnover", _money(accounts.get("turnover")))
+    p("EBITDA", _money(accounts.get("ebitda")))
+    p("Net profit", _money(accounts.get("netProfit")))
+    p("Net assets", _money(accounts.get("netAssets")))
+    p("Total borrowings", _money(accounts.get("totalBorrowings")))
+    if mgmt.get("periodEnd"):
+        p("Management accounts to", _safe(mgmt.get("periodEnd")))
+    p("Monthly finance commitments", _money(existing.get("monthlyFinanceCommitments")))
+    y -= 2 * mm
+
+    h2("Pack readiness")
+    p("Status", f"{_safe(rules.get('status'))} – {_safe(rules.get('explanation'))}")
+    y -= 2 * mm
+    for title, key in (
+        ("Missing (required)", "missing"),
+        ("Conditional required now", "required_now"),
+        ("Flags", "flags"),
+        ("Suggestions", "suggestions"),
+    ):
+        if rules.get(key):
+            bullets(title, rules[key])
+
+    if narrative:
+        h2(narrative_heading)
+        c.setFont("Helvetica", 9.5)
+        for para in narrative.splitlines():
+            for line in textwrap.wrap(para, 115) or [""]:
+                new_page_if_needed()
+                c.setFont("Helvetica", 9.5)
+                c.drawString(margin_x, y, line)
+                y -= 4.5 * mm
 
+    c.showPage()
+    c.save()
+    return out_path
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from core import RuleResult, evaluate_rules, readiness_score
+
+PORTFOLIO_FILENAME = "_portfolio.sqlite"
+
+# Exposure breakdowns kept in the totals.
+DIMENSIONS = ("productType", "vehicleType", "newOrUsed", "supplier")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS contributions (deal_ref TEXT PRIMARY KEY, data TEXT NOT NULL) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), data TEXT NOT NULL)",
+)
+
+# Flags that embed deal-specific values are grouped under one label.
+_FLAG_GROUPS = (
+    (re.compile(r"^Batch [^:]*: "), "Batch: "),
+    (re.compile(r"^Accounts are \d+ months old"), "Accounts are over 12 months old"),
+    (re.compile(r"^Company register: \S+ status is"), "Company register: status is"),
+    (re.compile(r"'[^']*'"), "'…'"),
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}\b"), "…"),
+)
+
+
+def flag_group(flag: str) -> str:
+    for pattern, repl in _FLAG_GROUPS:
+        flag = pattern.sub(repl, flag)
+    return flag
+
+
+def _amount(m: Any) -> float:
+    try:
+        return float(m.get("amount") or 0) if isinstance(m, dict) else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def deal_contribution(app: Dict[str, Any], rr: RuleResult) -> Dict[str, Any]:
+    """
+    What one deal adds to the portfolio totals. Requested amounts are broken
+    down by product type; batch prices by vehicle type, new/used and supplier.
+    """
+    status, _ = readiness_score(rr)
+    facility = app.get("facility") or {}
+    requested = _amount(facility.get("totalAmountRequested"))
+    dims: Dict[str, Dict[str, float]] = {d: {} for d in DIMENSIONS}
+    dims["productType"][str(facility.get("productType") or "unknown")] = requested
+
+    batches = (app.get("assets") or {}).get("batches") or []
+    for b in batches if isinstance(batches, list) else []:
+        if not isinstance(b, dict):
+            continue
+        amt = _amount(b.get("totalPrice"))
+        if not amt:
+            try:
+                amt = _amount(b.get("avgUnitPrice")) * int(b.get("quantity") or 0)
+            except (TypeError, ValueError):
+                amt = 0.0
+        for dim, key in (
+            ("vehicleType", b.get("vehicleType")),
+            ("newOrUsed", b.get("newOrUsed")),
+            ("supplier", b.get("supplierName")),
+        ):
+            k = str(key or "unknown")
+            dims[dim][k] = dims[dim].get(k, 0.0) + amt
+
+    return {
+        "status": status,
+        "requested": requested,
+        "dims": dims,
+        "flags": sorted({flag_group(f) for f in rr.flags}),
+    }
+
+
+def empty_totals() -> Dict[str, Any]:
+    return {
+        "deals": 0,
+        "status": {},
+        "requested": 0.0,
+        "requestedByStatus": {},
+        "dims": {d: {} for d in DIMENSIONS},
+        "flags": {},
+    }
+
+
+def _add_count(counts: Dict[str, int], key: str, n: int) -> None:
+    v = counts.get(key, 0) + n
+    if v:
+        counts[key] = v
+    else:
+        counts.pop(key, None)
+
+
+def _add_exposure(exposure: Dict[str, Dict[str, Any]], key: str, amount: float, n: int) -> None:
+    e = exposure.setdefault(key, {"amount": 0.0, "deals": 0})
+    e["deals"] += n
+    e["amount"] = round(e["amount"] + n * amount, 2)
+    if not e["deals"]:
+        del exposure[key]
+
+
+def apply_contribution(totals: Dict[str, Any], contrib: Dict[str, Any], sign: int) -> None:
+    """Adds (sign=1) or removes (sign=-1) one deal's contribution in place."""
+    status = contrib["status"]
+    totals["deals"] += sign
+    _add_count(totals["status"], status, sign)
+    totals["requested"] = round(totals["requested"] + sign * contrib["requested"], 2)
+    by_status = totals["requestedByStatus"]
+    by_status[status] = round(by_status.get(status, 0.0) + sign * contrib["requested"], 2)
+    if not totals["status"].get(status):
+        by_status.pop(status, None)
+    for dim, amounts in contrib["dims"].items():
+        exposure = totals["dims"].setdefault(dim, {})
+        for key, amount in amounts.items():
+            _add_exposure(exposure, key, amount, sign)
+    for flag in contrib["flags"]:
+        _add_count(totals["flags"], flag, sign)
+
+
+def top_flags(totals: Dict[str, Any], n: int = 10) -> List[Tuple[str, int]]:
+    return sorted(totals["flags"].items(), key=lambda kv: (-kv[1], kv[0]))[:n]
+
+
+class Portfolio:
+    """
+    Portfolio-wide readiness and exposure totals, maintained incrementally.
+
+    Each recorded deal's last contribution is stored next to the totals, so a
+    save only subtracts the old contribution and adds the new one; reading the
+    totals never touches the deal files.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            for stmt in _SCHEMA:
+                conn.execute(stmt)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[Tuple[sqlite3.Connection, Dict[str, Any]]]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT data FROM totals WHERE id = 0").fetchone()
+                totals = json.loads(row[0]) if row else empty_totals()
+                yield conn, totals
+                conn.execute(
+                    "INSERT OR REPLACE INTO totals (id, data) VALUES (0, ?)", (json.dumps(totals),)
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def totals(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM totals WHERE id = 0").fetchone()
+        return json.loads(row[0]) if row else empty_totals()
+
+    def _replace(self, conn: sqlite3.Connection, totals: Dict[str, Any], deal_ref: str, new: Optional[Dict[str, Any]]) -> None:
+        row = conn.execute("SELECT data FROM contributions WHERE deal_ref = ?", (deal_ref,)).fetchone()
+        if row:
+            apply_contribution(totals, json.loads(row[0]), -1)
+        if new is None:
+            conn.execute("DELETE FROM contributions WHERE deal_ref = ?", (deal_ref,))
+        else:
+            apply_contribution(totals, new, 1)
+            conn.execute(
+                "INSERT OR REPLACE INTO contributions (deal_ref, data) VALUES (?, ?)", (deal_ref, json.dumps(new))
+            )
+
+    def record(self, deal_ref: str, app: Dict[str, Any], rr: RuleResult) -> None:
+        """Applies the delta for a saved deal: its old contribution out, new one in."""
+        new = deal_contribution(app, rr)
+        with self._transaction() as (conn, totals):
+            self._replace(conn, totals, deal_ref, new)
+
+    def remove(self, deal_ref: str) -> None:
+        with self._transaction() as (conn, totals):
+            self._replace(conn, totals, deal_ref, None)
+
+    def rebuild(self, deals: Iterator[Tuple[str, Dict[str, Any]]], **rule_kwargs: Any) -> int:
+        """
+        Recomputes everything from scratch (initial backfill or repair after
+        a rules change). This is the only path that reads every deal.
+        `rule_kwargs` (reference data) are passed on to evaluate_rules.
+        """
+        n = 0
+        with self._transaction() as (conn, totals):
+            conn.execute("DELETE FROM contributions")
+            totals.clear()
+            totals.update(empty_totals())
+            for deal_ref, app in deals:
+                self._replace(conn, totals, deal_ref, deal_contribution(app, evaluate_rules(app, **rule_kwargs)))
+                n += 1
+        return n
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    from serializers import iter_deals
+
+    parser = argparse.ArgumentParser(description="Portfolio readiness and exposure totals.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("rebuild", help="Recompute the totals from every saved deal.")
+    r.add_argument("data_dir", type=Path)
+    r.add_argument("--postcodes", type=Path, help="postcode index (see postcodes.py)")
+    r.add_argument("--companies", type=Path, help="company register snapshot (see companies.py)")
+    s = sub.add_parser("show", help="Print the current totals.")
+    s.add_argument("data_dir", type=Path)
+    args = parser.parse_args(argv)
+
+    portfolio = Portfolio(args.data_dir / PORTFOLIO_FILENAME)
+    if args.cmd == "rebuild":
+        rule_kwargs: Dict[str, Any] = {}
+        if args.postcodes:
+            from postcodes import PostcodeIndex
+
+            rule_kwargs["postcodes"] = PostcodeIndex(args.postcodes)
+        if args.companies:
+            from companies import CompanyRegister
+
+            rule_kwargs["companies"] = CompanyRegister(args.companies)
+        n = portfolio.rebuild(iter_deals(args.data_dir), **rule_kwargs)
+        print(f"Rebuilt portfolio totals from {n} deals")
+    else:
+        print(json.dumps(portfolio.totals(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
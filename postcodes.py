@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import bisect
+import csv
+import heapq
+import mmap
+import os
+import re
+import struct
+import tempfile
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+_POSTCODE_RE = re.compile(r"^(?:([A-Z]{1,2}[0-9][A-Z0-9]?)([0-9][A-Z]{2})|(GIR)(0AA))$")
+_STRIP_RE = re.compile(r"[^A-Z0-9]")
+
+_MAGIC = b"PCIX"
+_VERSION = 1
+_HEADER = struct.Struct("<4sII4x")
+_KEY_LEN = 7
+_RECORD_LEN = 8
+_LIVE = b"\x00"
+_TERMINATED = b"\x01"
+
+# Column names tried in order when reading an ONS-style postcode CSV.
+_POSTCODE_COLUMNS = ("pcds", "pcd", "pcd2", "postcode")
+_TERMINATED_COLUMNS = ("doterm",)
+
+
+def normalise_postcode(raw: Any) -> Optional[str]:
+    """
+    Returns the postcode in canonical "OUT IN" form, or None if it is not a
+    well-formed UK postcode.
+    """
+    if not isinstance(raw, str):
+        return None
+    m = _POSTCODE_RE.match(_STRIP_RE.sub("", raw.upper()))
+    if not m:
+        return None
+    outward = m.group(1) or m.group(3)
+    inward = m.group(2) or m.group(4)
+    return f"{outward} {inward}"
+
+
+def _key(postcode: str) -> bytes:
+    outward, inward = postcode.split(" ")
+    return (outward.ljust(4) + inward).encode("ascii")
+
+
+@dataclass
+class PostcodeMatch:
+    postcode: str
+    terminated: bool
+
+
+class _Keys:
+    """Read-only sequence view over the index keys, for use with bisect."""
+
+    __slots__ = ("_mm", "_count")
+
+    def __init__(self, mm: mmap.mmap, count: int):
+        self._mm = mm
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> bytes:
+        off = _HEADER.size + i * _RECORD_LEN
+        return self._mm[off:off + _KEY_LEN]
+
+
+class PostcodeIndex:
+    """
+    Sorted fixed-width postcode index, memory-mapped from a file written by
+    build_index(). Opening it only reads the header.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self._fh = open(self.path, "rb")
+        try:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._fh.close()
+            raise ValueError(f"{self.path} is not a postcode index (empty file)")
+        if len(self._mm) < _HEADER.size:
+            self.close()
+            raise ValueError(f"{self.path} is not a postcode index (v{_VERSION})")
+        magic, version, count = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a postcode index (v{_VERSION})")
+        if len(self._mm) != _HEADER.size + count * _RECORD_LEN:
+            self.close()
+            raise ValueError(f"{self.path} is truncated")
+        self._keys = _Keys(self._mm, count)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, postcode: str) -> bool:
+        return self.lookup(postcode) is not None
+
+    def __enter__(self) -> "PostcodeIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if not self._mm.closed:
+            self._mm.close()
+        self._fh.close()
+
+    def _match(self, key: bytes, lo: int) -> tuple[Optional[PostcodeMatch], int]:
+        i = bisect.bisect_left(self._keys, key, lo)
+        if i < len(self._keys) and self._keys[i] == key:
+            off = _HEADER.size + i * _RECORD_LEN + _KEY_LEN
+            terminated = self._mm[off:off + 1] == _TERMINATED
+            return PostcodeMatch(postcode="", terminated=terminated), i
+        return None, i
+
+    def lookup(self, postcode: str) -> Optional[PostcodeMatch]:
+        """
+        Returns the match for a (possibly unnormalised) postcode, or None if it
+        is malformed or not in the index.
+        """
+        norm = normalise_postcode(postcode)
+        if norm is None:
+            return None
+        match, _ = self._match(_key(norm), 0)
+        if match is not None:
+            match.postcode = norm
+        return match
+
+    def lookup_many(self, postcodes: Iterable[str]) -> Dict[str, Optional[PostcodeMatch]]:
+        """
+        Bulk lookup keyed by the input strings. Queries are normalised,
+        de-duplicated and resolved in sorted order so each binary search starts
+        where the previous one ended.
+        """
+        raw_by_norm: Dict[str, List[str]] = {}
+        out: Dict[str, Optional[PostcodeMatch]] = {}
+        for raw in postcodes:
+            norm = normalise_postcode(raw)
+            if norm is None:
+                out[raw] = None
+            else:
+                raw_by_norm.setdefault(norm, []).append(raw)
+
+        lo = 0
+        for key, norm in sorted((_key(n), n) for n in raw_by_norm):
+            match, lo = self._match(key, lo)
+            if match is not None:
+                match.postcode = norm
+            for raw in raw_by_norm[norm]:
+                out[raw] = match
+        return out
+
+
+def _pick_column(fieldnames: List[str], candidates: Iterable[str]) -> Optional[str]:
+    lowered = {f.strip().lower(): f for f in fieldnames}
+    for c in candidates:
+        if c in lowered:
+            return lowered[c]
+    return None
+
+
+def _read_records(fh: BinaryIO) -> Iterator[bytes]:
+    while True:
+        rec = fh.read(_RECORD_LEN)
+        if not rec:
+            return
+        yield rec
+
+
+def build_index(
+    csv_path: str | os.PathLike, out_path: str | os.PathLike, chunk_records: int = 1_000_000
+) -> int:
+    """
+    Streams an ONS-style postcode CSV (ONSPD / NSPL / Code-Point) and writes a
+    sorted, fixed-width index for PostcodeIndex. Returns the number of
+    postcodes written. Rows with malformed postcodes are skipped.
+
+    Memory is bounded by `chunk_records`: larger inputs are sorted in chunks
+    spilled to temporary files next to `out_path`, then merged.
+    """
+    out_path = Path(out_path)
+    tmp_path = out_path.with_suffix(out_path.suffix + ".tmp")
+    count = 0
+    with ExitStack() as stack:
+        chunks: List[BinaryIO] = []
+        records: List[bytes] = []
+
+        def spill() -> None:
+            fh = stack.enter_context(tempfile.TemporaryFile(dir=out_path.parent))
+            records.sort()
+            fh.write(b"".join(records))
+            fh.seek(0)
+            chunks.append(fh)
+            records.clear()
+
+        with open(csv_path, newline="", encoding="utf-8-sig") as fh:
+            reader = csv.DictReader(fh)
+            pc_col = _pick_column(reader.fieldnames or [], _POSTCODE_COLUMNS)
+            if pc_col is None:
+                raise ValueError(f"{csv_path}: no postcode column (expected one of {', '.join(_POSTCODE_COLUMNS)})")
+            term_col = _pick_column(reader.fieldnames or [], _TERMINATED_COLUMNS)
+            for row in reader:
+                norm = normalise_postcode(row.get(pc_col))
+                if norm is None:
+                    continue
+                status = _TERMINATED if term_col and (row.get(term_col) or "").strip() else _LIVE
+                records.append(_key(norm) + status)
+                if len(records) >= chunk_records:
+                    spill()
+
+        records.sort()
+        merged = heapq.merge(records, *(_read_records(c) for c in chunks))
+        # Live sorts before terminated, so the first record for a key wins.
+        with open(tmp_path, "wb") as out:
+            out.write(_HEADER.pack(_MAGIC, _VERSION, 0))
+            prev = None
+            for rec in merged:
+                key = rec[:_KEY_LEN]
+                if key != prev:
+                    out.write(rec)
+                    count += 1
+                    prev = key
+            out.seek(0)
+            out.write(_HEADER.pack(_MAGIC, _VERSION, count))
+    os.replace(tmp_path, out_path)
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Offline UK postcode reference index.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Build an index from an ONS-style postcode CSV.")
+    b.add_argument("csv_path")
+    b.add_argument("out_path")
+    q = sub.add_parser("lookup", help="Look up one or more postcodes.")
+    q.add_argument("index_path")
+    q.add_argument("postcodes", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "build":
+        n = build_index(args.csv_path, args.out_path)
+        print(f"Wrote {n} postcodes to {args.out_path}")
+        return 0
+
+    with PostcodeIndex(args.index_path) as idx:
+        matches = idx.lookup_many(args.postcodes)
+        for raw in args.postcodes:
+            match = matches[raw]
+            if match is None:
+                print(f"{raw}\tunknown")
+            else:
+                print(f"{raw}\t{match.postcode}\t{'terminated' if match.terminated else 'live'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are still serialised within one process
+    fcntl = None
+
+# (save counter, mtime_ns, size, inode) of a saved deal; see store_version.
+Version = Tuple[int, int, int, int]
+
+
+@lru_cache(maxsize=None)
+def _optional(module: str) -> Any:
+    """Imports an optional backend on first use; None if it is not installed."""
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        return None
+
+
+class Serializer(ABC):
+    name = ""
+    suffix = ""
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        ...
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        ...
+
+
+class JsonSerializer(Serializer):
+    """Human-readable, indented JSON (the default)."""
+
+    name = "json"
+    suffix = ".json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, indent=2).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        # Any JSON file can be parsed by the fast backend when it is installed.
+        orjson = _optional("orjson")
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+
+class OrjsonSerializer(JsonSerializer):
+    """Compact JSON via orjson; same file suffix and format as JsonSerializer."""
+
+    name = "orjson"
+
+    @property
+    def available(self) -> bool:
+        return _optional("orjson") is not None
+
+    def dumps(self, obj: Any) -> bytes:
+        orjson = _optional("orjson")
+        if orjson is None:
+            raise RuntimeError("orjson is not installed (pip install orjson)")
+        return orjson.dumps(obj)
+
+
+class MsgpackSerializer(Serializer):
+    """Compact binary MessagePack."""
+
+    name = "msgpack"
+    suffix = ".msgpack"
+
+    @property
+    def available(self) -> bool:
+        return _optional("msgpack") is not None
+
+    def dumps(self, obj: Any) -> bytes:
+        msgpack = _optional("msgpack")
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed (pip install msgpack)")
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        msgpack = _optional("msgpack")
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed (pip install msgpack)")
+        return msgpack.unpackb(data, raw=False)
+
+
+SERIALIZERS: Dict[str, Serializer] = {
+    s.name: s for s in (JsonSerializer(), OrjsonSerializer(), MsgpackSerializer())
+}
+SUFFIXES: Tuple[str, ...] = (".json", ".msgpack")
+
+
+def get_serializer(fmt: Optional[str] = None) -> Serializer:
+    fmt = fmt or DEFAULT_FORMAT
+    if fmt not in SERIALIZERS:
+        raise ValueError(f"Unknown deal format {fmt!r} (expected one of {', '.join(SERIALIZERS)})")
+    return SERIALIZERS[fmt]
+
+
+def _default_format() -> str:
+    """DEAL_FORMAT, checked up front so a bad value fails at startup, not on Save."""
+    fmt = os.environ.get("DEAL_FORMAT", "json")
+    if fmt not in SERIALIZERS:
+        raise ValueError(f"DEAL_FORMAT={fmt!r} is not a deal format (expected one of {', '.join(SERIALIZERS)})")
+    if not SERIALIZERS[fmt].available:
+        raise RuntimeError(f"DEAL_FORMAT={fmt!r} needs the {fmt} package installed (pip install {fmt})")
+    return fmt
+
+
+DEFAULT_FORMAT = _default_format()
+
+
+def detect_format(data: bytes) -> str:
+    """
+    Sniffs the format from the leading byte: JSON documents start with '{' or
+    '[' (after whitespace / BOM), MessagePack maps and arrays with 0x80-0x9f
+    or 0xdc-0xdf.
+    """
+    head = data.lstrip(b" \t\r\n\xef\xbb\xbf")[:1]
+    if head in (b"{", b"["):
+        return "json"
+    if head and (0x80 <= head[0] <= 0x9F or 0xDC <= head[0] <= 0xDF):
+        return "msgpack"
+    raise ValueError("Unrecognised deal file format")
+
+
+def dumps(obj: Any, fmt: Optional[str] = None) -> bytes:
+    return get_serializer(fmt).dumps(obj)
+
+
+def loads(data: bytes) -> Any:
+    if data.startswith(b"\xef\xbb\xbf"):
+        data = data[3:]
+    return SERIALIZERS[detect_format(data)].loads(data)
+
+
+def read(path: str | os.PathLike) -> Any:
+    return loads(Path(path).read_bytes())
+
+
+def write(path: str | os.PathLike, obj: Any, fmt: Optional[str] = None) -> None:
+    Path(path).write_bytes(dumps(obj, fmt))
+
+
+def deal_path(data_dir: Path, deal_ref: str, fmt: Optional[str] = None) -> Path:
+    """
+    Path of the saved deal, whichever format it was written in; if none
+    exists yet, the path it would be saved to in `fmt`.
+    """
+    for suffix in SUFFIXES:
+        p = data_dir / f"{deal_ref}{suffix}"
+        if p.exists():
+            return p
+    return data_dir / f"{deal_ref}{get_serializer(fmt).suffix}"
+
+
+def save_deal(data_dir: Path, deal_ref: str, app: Dict[str, Any], fmt: Optional[str] = None) -> Path:
+    """
+    Writes the deal in `fmt` (default DEAL_FORMAT) and removes any copy saved
+    under another format's suffix, so each deal has exactly one file. The file
+    is replaced atomically, so readers never see a partial write.
+    """
+    ser = get_serializer(fmt)
+    p = data_dir / f"{deal_ref}{ser.suffix}"
+    tmp = p.with_name(f".{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(ser.dumps(app))
+    os.replace(tmp, p)
+    for suffix in SUFFIXES:
+        if suffix != ser.suffix:
+            (data_dir / f"{deal_ref}{suffix}").unlink(missing_ok=True)
+    return p
+
+
+@contextmanager
+def deal_lock(data_dir: Path, deal_ref: str, shared: bool = False) -> Iterator[None]:
+    """
+    Cross-process lock on one deal: an flock on `.<deal_ref>.lock` next to it.
+    Writers hold it exclusively around the version check, the file replace and
+    the version bump; readers take it shared to see a consistent pair.
+    """
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(data_dir / f".{deal_ref}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _counter_path(data_dir: Path, deal_ref: str) -> Path:
+    return data_dir / f".{deal_ref}.version"
+
+
+def _read_counter(data_dir: Path, deal_ref: str) -> int:
+    try:
+        return int(_counter_path(data_dir, deal_ref).read_text(encoding="ascii"))
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def store_version(data_dir: Path, deal_ref: str) -> Optional[Version]:
+    """
+    The deal's version, or None if it has not been saved: its save counter
+    plus the file's mtime, size and inode. Savers under deal_lock bump the
+    counter, which is never reset, so versions are not reused even if the
+    deal is deleted; the file stat catches writers that skip the counter
+    (manual edits, other tools).
+    """
+    for suffix in SUFFIXES:
+        try:
+            st = (data_dir / f"{deal_ref}{suffix}").stat()
+        except FileNotFoundError:
+            continue
+        return _read_counter(data_dir, deal_ref), st.st_mtime_ns, st.st_size, st.st_ino
+    return None
+
+
+def bump_version(data_dir: Path, deal_ref: str) -> int:
+    """Increments the deal's save counter; call with deal_lock held."""
+    counter = _read_counter(data_dir, deal_ref) + 1
+    p = _counter_path(data_dir, deal_ref)
+    tmp = p.with_name(f"{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(str(counter), encoding="ascii")
+    os.replace(tmp, p)
+    return counter
+
+
+def iter_deal_files(data_dir: Path) -> Iterator[Path]:
+    """Saved deal files in `data_dir`; names starting with '_' are reserved."""
+    for p in sorted(data_dir.iterdir()):
+        if p.suffix in SUFFIXES and p.is_file() and not p.name.startswith("_"):
+            yield p
+
+
+def iter_deals(data_dir: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    for p in iter_deal_files(data_dir):
+        yield p.stem, read(p)
+
+
+def convert(data_dir: Path, fmt: str) -> int:
+    """Rewrites every saved deal in `data_dir` in `fmt`. Returns the count."""
+    n = 0
+    for p in list(iter_deal_files(data_dir)):
+        with deal_lock(data_dir, p.stem):
+            save_deal(data_dir, p.stem, read(p), fmt)
+            bump_version(data_dir, p.stem)
+        n += 1
+    return n
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Deal file serialization tools.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("convert", help="Rewrite all saved deals in another format.")
+    c.add_argument("data_dir", type=Path)
+    c.add_argument("--to", dest="fmt", required=True, choices=sorted(SERIALIZERS))
+    args = parser.parse_args(argv)
+
+    if not get_serializer(args.fmt).available:
+        parser.error(f"format {args.fmt!r} needs its optional dependency installed")
+    n = convert(args.data_dir, args.fmt)
+    print(f"Converted {n} deals in {args.data_dir} to {args.fmt}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
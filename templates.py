@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from string import Formatter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from core import RuleResult, evaluate_rules, readiness_score
+from models import Deal, as_dict, new_deal
+
+_MISSING = object()
+
+FUNDING_NARRATIVE_V1 = """\
+Applicant: {applicant.legalName}
+Business: UK vehicle hire ({applicant.industry.subSector}).
+Request: {facility.productType} over {facility.termMonths} months for {facility.financePurpose}.
+
+Operations: fleet size {fleetOps.fleetSizeTotal}, utilisation {fleetOps.avgUtilisationPercent}%, \
+revenue per vehicle per month approx GBP {revenue_per_vehicle:,.0f}.
+Key risks addressed: {flags_text}."""
+
+LENDER_EMAIL_V1 = """\
+Subject: {applicant.legalName} ({broker.internalDealRef}) – pack status {status}
+
+Hi,
+
+Update on {applicant.legalName}: {facility.productType} over {facility.termMonths} months for \
+{facility.financePurpose}, {facility.totalAmountRequested.currency} \
+{facility.totalAmountRequested.amount:,.0f} requested.
+
+Pack status: {status} – {explanation}
+Outstanding items: {outstanding_text}
+Key risks: {flags_text}
+
+Kind regards,
+{broker.brokerContactName}
+{broker.brokerFirmName}"""
+
+
+# Keys deal_context adds to the deal's own sections.
+CONTEXT_KEYS = ("status", "explanation", "flags_text", "outstanding_text", "revenue_per_vehicle")
+
+
+def _check_field(path: Tuple[str, ...]) -> Optional[str]:
+    """Why `path` can never resolve in a render context, or None if it can."""
+    if len(path) == 1 and path[0] in CONTEXT_KEYS:
+        return None
+    node: Any = new_deal("")
+    for i, key in enumerate(path):
+        if node is None:
+            return None  # optional section (null in a blank deal): shape unknown
+        if not isinstance(node, dict):
+            return f"{'.'.join(path[:i])} has no fields"
+        if key not in node:
+            return f"unknown field {'.'.join(path[:i + 1])}"
+        node = node[key]
+    return None
+
+
+class Template:
+    """
+    A str.format-style template compiled once into literal and field parts.
+    Fields are dotted paths into the render context (the deal JSON plus the
+    computed keys from deal_context), checked against the blank deal's shape
+    when compiled; values missing from a deal render as "".
+    """
+
+    __slots__ = ("name", "version", "source", "_parts")
+
+    def __init__(self, name: str, version: int, source: str):
+        self.name = name
+        self.version = version
+        self.source = source
+        parts: List[Tuple[str, Optional[Tuple[str, ...]], str]] = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if field is None:
+                parts.append((literal, None, ""))
+                continue
+            where = f"Template {name} v{version}: {{{field}}}"
+            if conversion:
+                raise ValueError(f"{where}: conversions (!{conversion}) are not supported")
+            if not field or "[" in field or "{" in (spec or ""):
+                raise ValueError(f"{where}: fields must be dotted names (no positional, indexed or nested fields)")
+            path = tuple(field.split("."))
+            problem = _check_field(path)
+            if problem:
+                raise ValueError(f"{where}: {problem}")
+            parts.append((literal, path, spec or ""))
+        self._parts = tuple(parts)
+
+    @property
+    def title(self) -> str:
+        """Human-readable name, e.g. "Funding narrative"."""
+        return self.name.replace("_", " ").capitalize()
+
+    def render(self, context: Dict[str, Any]) -> str:
+        out: List[str] = []
+        for literal, path, spec in self._parts:
+            out.append(literal)
+            if path is None:
+                continue
+            v: Any = context
+            for key in path:
+                v = v.get(key, _MISSING) if isinstance(v, dict) else _MISSING
+                if v is _MISSING:
+                    break
+            if v is _MISSING or v is None:
+                continue
+            try:
+                out.append(format(v, spec))
+            except (TypeError, ValueError):
+                out.append(str(v))
+        return "".join(out)
+
+
+# name -> version -> Template
+TEMPLATES: Dict[str, Dict[int, Template]] = {}
+
+
+def register(name: str, version: int, source: str) -> Template:
+    """Compiles and registers a template. Versions are immutable once registered."""
+    existing = TEMPLATES.get(name, {}).get(version)
+    if existing is not None and existing.source != source:
+        raise ValueError(f"Template {name} v{version} is already registered with different text")
+    t = Template(name, version, source)
+    TEMPLATES.setdefault(name, {})[version] = t
+    return t
+
+
+def get_template(name: str, version: Optional[int] = None) -> Template:
+    """Returns the given version, or the latest one."""
+    versions = TEMPLATES.get(name)
+    if not versions:
+        raise KeyError(f"Unknown template {name!r} (known: {', '.join(sorted(TEMPLATES))})")
+    if version is None:
+        version = max(versions)
+    if version not in versions:
+        raise KeyError(f"Unknown version {version} of template {name!r}")
+    return versions[version]
+
+
+register("funding_narrative", 1, FUNDING_NARRATIVE_V1)
+register("lender_email", 1, LENDER_EMAIL_V1)
+
+
+def deal_context(app: Dict[str, Any], rr: RuleResult) -> Dict[str, Any]:
+    """The deal's top-level sections plus values derived from its RuleResult."""
+    status, explanation = readiness_score(rr)
+    outstanding = rr.missing + rr.required_now
+    ctx = dict(app)
+    revenue = (app.get("fleetOps") or {}).get("avgRevenuePerVehiclePerMonth")
+    ctx.update(
+        status=status,
+        explanation=explanation,
+        revenue_per_vehicle=(revenue.get("amount") if isinstance(revenue, dict) else None) or 0,
+        flags_text=", ".join(rr.flags) if rr.flags else "no major flags identified in intake",
+        outstanding_text="; ".join(outstanding) if outstanding else "none",
+    )
+    return ctx
+
+
+def render(
+    name: str,
+    app: Union[Dict[str, Any], Deal],
+    rr: Optional[RuleResult] = None,
+    version: Optional[int] = None,
+    **rule_kwargs: Any,
+) -> str:
+    """Renders one deal; if `rr` is not given, rules are evaluated with `rule_kwargs`."""
+    app = as_dict(app)
+    if rr is None:
+        rr = evaluate_rules(app, **rule_kwargs)
+    return get_template(name, version).render(deal_context(app, rr))
+
+
+def render_many(
+    name: str,
+    deals: Iterable[Tuple[str, Union[Dict[str, Any], Deal], Optional[RuleResult]]],
+    version: Optional[int] = None,
+    **rule_kwargs: Any,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Renders one template for many (deal_ref, deal, rule_result) tuples and
+    yields (deal_ref, text). Missing rule results are evaluated with
+    `rule_kwargs` (reference data) passed on to evaluate_rules.
+    """
+    template = get_template(name, version)
+    for deal_ref, app, rr in deals:
+        app = as_dict(app)
+        if rr is None:
+            rr = evaluate_rules(app, **rule_kwargs)
+        yield deal_ref, template.render(deal_context(app, rr))
+
+
+def write_text(rendered: Iterable[Tuple[str, str]], out_path: str | os.PathLike) -> int:
+    n = 0
+    with open(out_path, "w", encoding="utf-8") as fh:
+        for deal_ref, text in rendered:
+            if n:
+                fh.write("\n\n")
+            fh.write(f"===== {deal_ref} =====\n{text}\n")
+            n += 1
+    return n
+
+
+def write_jsonl(
+    rendered: Iterable[Tuple[str, str]], out_path: str | os.PathLike, template: Template
+) -> int:
+    n = 0
+    with open(out_path, "w", encoding="utf-8") as fh:
+        for deal_ref, text in rendered:
+            fh.write(json.dumps(
+                {"dealRef": deal_ref, "template": template.name, "version": template.version, "text": text}
+            ))
+            fh.write("\n")
+            n += 1
+    return n
+
+
+def write_pdfs(
+    deals: Iterable[Tuple[str, Dict[str, Any], Optional[RuleResult]]],
+    out_dir: str | os.PathLike,
+    name: str = "funding_narrative",
+    version: Optional[int] = None,
+    **rule_kwargs: Any,
+) -> int:
+    """
+    One credit summary PDF per deal, with the rendered template included
+    under its title. Missing rule results are evaluated with `rule_kwargs`.
+    """
+    from dataclasses import asdict
+
+    from pdfgen import generate_credit_summary_pdf
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    template = get_template(name, version)
+    n = 0
+    for deal_ref, app, rr in deals:
+        app = as_dict(app)
+        if rr is None:
+            rr = evaluate_rules(app, **rule_kwargs)
+        status, explanation = readiness_score(rr)
+        generate_credit_summary_pdf(
+            app,
+            {"status": status, "explanation": explanation, **asdict(rr)},
+            str(out_dir / f"{deal_ref}_credit_summary.pdf"),
+            narrative=template.render(deal_context(app, rr)),
+            narrative_heading=template.title,
+        )
+        n += 1
+    return n
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    from serializers import iter_deals
+
+    parser = argparse.ArgumentParser(description="Render narrative / lender email templates for saved deals.")
+    parser.add_argument("data_dir", type=Path)
+    parser.add_argument("--template", default="funding_narrative", choices=sorted(TEMPLATES))
+    parser.add_argument("--version", type=int, help="template version (default: latest)")
+    parser.add_argument("--format", dest="fmt", default="text", choices=("text", "jsonl", "pdf"))
+    parser.add_argument("--out", type=Path, required=True, help="output file (text/jsonl) or directory (pdf)")
+    parser.add_argument("--postcodes", type=Path, help="postcode index (see postcodes.py)")
+    parser.add_argument("--companies", type=Path, help="company register snapshot (see companies.py)")
+    args = parser.parse_args(argv)
+
+    rule_kwargs: Dict[str, Any] = {}
+    if args.postcodes:
+        from postcodes import PostcodeIndex
+
+        rule_kwargs["postcodes"] = PostcodeIndex(args.postcodes)
+    if args.companies:
+        from companies import CompanyRegister
+
+        rule_kwargs["companies"] = CompanyRegister(args.companies)
+
+    deals = ((ref, app, None) for ref, app in iter_deals(args.data_dir))
+    if args.fmt == "pdf":
+        n = write_pdfs(deals, args.out, args.template, args.version, **rule_kwargs)
+    elif args.fmt == "jsonl":
+        template = get_template(args.template, args.version)
+        n = write_jsonl(render_many(args.template, deals, args.version, **rule_kwargs), args.out, template)
+    else:
+        n = write_text(render_many(args.template, deals, args.version, **rule_kwargs), args.out)
+    print(f"Rendered {n} deals to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,65 @@
+import pytest
+
+from companies import CompanyRegister, build_register, normalise_company_number, prefill_applicant, register_mismatches
+
+CSV = """\
+CompanyName, CompanyNumber,RegAddress.AddressLine1,RegAddress.PostTown,RegAddress.PostCode,CompanyCategory,CompanyStatus,IncorporationDate,SICCode.SicText_1,SICCode.SicText_2
+ACME VANS LIMITED,01234567,1 High St,LEEDS,ls11ba,Private Limited Company,Active,01/02/2015,77110 - Renting and leasing of cars,None Supplied
+NORTH HIRE LLP,OC123456,2 Low Rd,YORK,YO1 7HH,Limited Liability Partnership,Dissolved,2010-05-06,,
+BAD ROW,not-a-number,,,,,,,,
+"""
+
+
+@pytest.fixture
+def register(tmp_path):
+    src = tmp_path / "companies.csv"
+    src.write_text(CSV, encoding="utf-8")
+    assert build_register(src, tmp_path / "companies.sqlite") == 2
+    with CompanyRegister(tmp_path / "companies.sqlite") as reg:
+        yield reg
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [("1234567", "01234567"), (" sc 12345 ", "SC012345"), ("OC123456", "OC123456"), ("R1234567", "R1234567"),
+     ("123456789", None), ("ABC", None), (None, None)],
+)
+def test_normalise_company_number(raw, expected):
+    assert normalise_company_number(raw) == expected
+
+
+def test_lookup(register):
+    rec = register.lookup("1234567")
+    assert rec.legal_name == "ACME VANS LIMITED"
+    assert rec.is_active
+    assert rec.incorporation_date == "2015-02-01"
+    assert rec.sic_codes == ["77110"]
+    assert rec.registered_address["postcode"] == "LS1 1BA"
+    assert register.lookup("99999999") is None
+    assert register.lookup("junk") is None
+
+
+def test_prefilled_applicant_matches(register):
+    applicant = {"legalStructure": "limited_company", "registeredAddress": {"line1": ""}}
+    prefill_applicant(applicant, register.lookup("01234567"))
+    assert applicant["legalName"] == "ACME VANS LIMITED"
+    assert applicant["registeredAddress"]["townCity"] == "LEEDS"
+    assert register_mismatches(applicant, register.lookup("01234567")) == []
+
+
+def test_register_mismatches(register):
+    ok = {
+        "legalName": "Acme Vans Ltd",
+        "incorporationDate": "2015-02-01",
+        "registeredAddress": {"postcode": "LS1 1BA"},
+        "legalStructure": "limited_company",
+    }
+    rec = register.lookup("01234567")
+    assert register_mismatches(ok, rec) == []
+    bad = dict(ok, legalName="Other Ltd", incorporationDate="2016-01-01", registeredAddress={"postcode": "M1 1AE"},
+               legalStructure="llp")
+    assert len(register_mismatches(bad, rec)) == 4
+
+    llp = register.lookup("OC123456")
+    flags = register_mismatches({"legalName": "North Hire LLP", "legalStructure": "llp"}, llp)
+    assert flags == ["Company register: OC123456 status is 'Dissolved', not Active."]
@@ -0,0 +1,99 @@
+from pathlib import Path
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from dealcache import DealCache
+from serializers import deal_path, read
+
+APP = str(Path(__file__).resolve().parent.parent / "app.py")
+REF = "deal_001"
+
+
+@pytest.fixture
+def at(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    st.cache_resource.clear()
+    at = AppTest.from_file(APP, default_timeout=30)
+    at.run()
+    yield at
+    st.cache_resource.clear()
+
+
+def number(at, label):
+    return next(w for w in at.number_input if w.label == label)
+
+
+def button(at, label):
+    return next(w for w in at.button if w.label == label)
+
+
+def saved():
+    return read(deal_path(Path("data"), REF))
+
+
+def conflicting_save(at):
+    """Saves in the app, has another writer change the deal, then saves again."""
+    number(at, "Total amount requested").set_value(1000).run()
+    button(at, "Save").click().run()
+    other = DealCache(Path("data"))
+    theirs, version = other.load(REF)
+    theirs["facility"]["totalAmountRequested"]["amount"] = 5000.0
+    other.save(REF, theirs, version)
+    number(at, "Turnover (last FY)").set_value(200).run()
+    button(at, "Save").click().run()
+    assert at.session_state["save_conflict"]["ref"] == REF
+
+
+def test_merge_resets_widgets_to_merged_deal(at):
+    conflicting_save(at)
+    button(at, "Merge and save").click().run()
+    assert number(at, "Total amount requested").value == 5000
+    assert number(at, "Turnover (last FY)").value == 200
+
+    # Saving again must not write the pre-merge widget values back.
+    button(at, "Save").click().run()
+    assert "save_conflict" not in at.session_state
+    facility, accounts = saved()["facility"], saved()["financials"]["accounts"]
+    assert facility["totalAmountRequested"]["amount"] == 5000
+    assert accounts["turnover"]["amount"] == 200
+
+
+def test_load_theirs_resets_widgets_to_their_deal(at):
+    conflicting_save(at)
+    button(at, "Discard my changes and load theirs").click().run()
+    assert number(at, "Total amount requested").value == 5000
+    assert number(at, "Turnover (last FY)").value == 0
+
+    button(at, "Save").click().run()
+    assert "save_conflict" not in at.session_state
+    assert saved()["facility"]["totalAmountRequested"]["amount"] == 5000
+    assert saved()["financials"]["accounts"]["turnover"]["amount"] == 0
+
+
+def test_save_keeps_widgets_editable(at):
+    number(at, "Total amount requested").set_value(1000).run()
+    button(at, "Save").click().run()
+    number(at, "Total amount requested").set_value(2000).run()
+    assert at.session_state["appdata"]["facility"]["totalAmountRequested"]["amount"] == 2000
+
+
+def test_merge_into_another_deal_has_no_common_base(at):
+    number(at, "Total amount requested").set_value(1000).run()
+    button(at, "Save").click().run()
+    other = DealCache(Path("data"))
+    theirs, _ = other.load(REF)
+    theirs["facility"]["totalAmountRequested"]["amount"] = 5000.0
+    theirs["financials"]["accounts"]["turnover"]["amount"] = 700.0
+    other.save("deal_002", theirs, None)
+
+    next(w for w in at.text_input if w.label == "Deal reference (file name)").set_value("deal_002").run()
+    button(at, "Save").click().run()
+    assert at.session_state["save_conflict"]["ref"] == "deal_002"
+    button(at, "Merge and save").click().run()
+
+    # deal_001's base must not make its unchanged fields give way to deal_002's.
+    merged = read(deal_path(Path("data"), "deal_002"))
+    assert merged["facility"]["totalAmountRequested"]["amount"] == 1000
+    assert merged["financials"]["accounts"]["turnover"]["amount"] == 0
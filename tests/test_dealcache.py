@@ -0,0 +1,74 @@
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from dealcache import DealCache, DealConflict
+from serializers import convert, save_deal
+
+REF = "deal_001"
+
+
+def test_versions_increase_and_stale_saves_conflict(tmp_path):
+    a, b = DealCache(tmp_path), DealCache(tmp_path)
+    v1 = a.save(REF, {"n": 1}, None)
+    data, v = b.load(REF)
+    assert (data, v) == ({"n": 1}, v1)
+    v2 = b.save(REF, {"n": 2}, v)
+    assert v2 > v1
+
+    # `a` still caches version v1 and must see b's save as a store version change.
+    assert a.load(REF) == ({"n": 2}, v2)
+    with pytest.raises(DealConflict) as e:
+        a.save(REF, {"n": 3}, v1)
+    assert (e.value.theirs, e.value.version) == ({"n": 2}, v2)
+
+
+def test_version_is_not_reused_after_delete(tmp_path):
+    cache = DealCache(tmp_path)
+    v1 = cache.save(REF, {"n": 1}, None)
+    (tmp_path / f"{REF}.json").unlink()
+    assert cache.load(REF) == (None, None)
+    assert cache.save(REF, {"n": 1}, None) > v1
+
+
+def test_writes_that_skip_the_counter_invalidate_and_conflict(tmp_path):
+    cache = DealCache(tmp_path)
+    v1 = cache.save(REF, {"n": 1}, None)
+    save_deal(tmp_path, REF, {"n": 22})
+    data, v2 = cache.load(REF)
+    assert data == {"n": 22} and v2 != v1
+    with pytest.raises(DealConflict):
+        cache.save(REF, {"n": 3}, v1)
+
+
+def test_convert_bumps_the_version(tmp_path):
+    cache = DealCache(tmp_path)
+    v1 = cache.save(REF, {"n": 1}, None)
+    assert convert(tmp_path, "json") == 1
+    data, v2 = cache.load(REF)
+    assert data == {"n": 1} and v2[0] == v1[0] + 1
+
+
+def _increment(data_dir: str, times: int) -> None:
+    cache = DealCache(Path(data_dir))
+    for _ in range(times):
+        while True:
+            data, version = cache.load(REF)
+            try:
+                cache.save(REF, {"n": data["n"] + 1}, version)
+                break
+            except DealConflict:
+                pass
+
+
+def test_compare_and_swap_across_processes(tmp_path):
+    DealCache(tmp_path).save(REF, {"n": 0}, None)
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_increment, args=(str(tmp_path), 25)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+        assert p.exitcode == 0
+    assert DealCache(tmp_path).load(REF)[0] == {"n": 100}
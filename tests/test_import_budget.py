@@ -0,0 +1,13 @@
+from benchmarks import bench_import
+
+
+def test_app_startup_imports_within_budget():
+    r = bench_import.measure()
+    assert "streamlit" in r["modules"]
+    assert r["ms"] <= bench_import.BUDGET_MS, r
+    assert r["own_ms"] <= bench_import.OWN_BUDGET_MS, r
+
+
+def test_heavy_dependencies_are_not_imported_at_startup():
+    r = bench_import.measure(runs=1)
+    assert r["eager"] == []
@@ -0,0 +1,24 @@
+import json
+
+from benchmarks.bench_models import sample_deal
+from models import MISSING, Deal, Money, new_deal
+
+
+def test_round_trip_keeps_values_and_key_order():
+    for d in (new_deal("deal_001"), sample_deal(7)):
+        m = Deal.from_dict(d)
+        assert json.dumps(m.to_dict()) == json.dumps(d)
+
+
+def test_unknown_and_reordered_keys_round_trip():
+    d = {"zNew": {"a": 1}, "facility": {"termMonths": 36, "custom": [1], "productType": "lease"}}
+    m = Deal.from_dict(d)
+    assert m.facility.term_months == 36
+    assert m.applicant is MISSING
+    assert json.dumps(m.to_dict()) == json.dumps(d)
+
+
+def test_money_fields_are_typed():
+    m = Deal.from_dict(new_deal("deal_001"))
+    assert m.facility.total_amount_requested == Money(0, "GBP")
+    assert isinstance(m.assets.batches[0].avg_unit_price, Money)
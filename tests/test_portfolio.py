@@ -0,0 +1,46 @@
+from benchmarks.bench_models import sample_deal
+from core import evaluate_rules
+from portfolio import Portfolio, empty_totals, flag_group, top_flags
+
+
+def record(portfolio, ref, app):
+    portfolio.record(ref, app, evaluate_rules(app))
+
+
+def test_record_rerecord_remove(tmp_path):
+    p = Portfolio(tmp_path / "_portfolio.sqlite")
+    assert p.totals() == empty_totals()
+
+    a, b = sample_deal(1), sample_deal(2)
+    record(p, "a", a)
+    record(p, "b", b)
+    t = p.totals()
+    assert t["deals"] == 2
+    requested = a["facility"]["totalAmountRequested"]["amount"] + b["facility"]["totalAmountRequested"]["amount"]
+    assert t["requested"] == round(requested, 2)
+
+    # Re-recording replaces the deal's old contribution instead of adding to it.
+    a["facility"]["totalAmountRequested"]["amount"] += 1000
+    record(p, "a", a)
+    assert p.totals()["deals"] == 2
+    assert p.totals()["requested"] == round(requested + 1000, 2)
+
+    p.remove("a")
+    p.remove("b")
+    assert p.totals() == empty_totals()
+
+
+def test_rebuild_matches_incremental(tmp_path):
+    deals = [(f"d{i}", sample_deal(i)) for i in range(20)]
+    inc = Portfolio(tmp_path / "inc.sqlite")
+    for ref, app in deals:
+        record(inc, ref, app)
+    full = Portfolio(tmp_path / "full.sqlite")
+    assert full.rebuild(iter(deals)) == 20
+    assert full.totals() == inc.totals()
+    assert top_flags(full.totals(), 3) == top_flags(inc.totals(), 3)
+
+
+def test_flag_group():
+    assert flag_group("Batch B-7: used vehicles average age > 36 months.") == "Batch: used vehicles average age > 36 months."
+    assert flag_group("Accounts are 19 months old: x") == "Accounts are over 12 months old: x"
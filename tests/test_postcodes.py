@@ -0,0 +1,59 @@
+import pytest
+
+from postcodes import PostcodeIndex, build_index, normalise_postcode
+
+CSV = """pcds,doterm
+SW1A 1AA,
+ec1a1bb,
+M1 1AE,200012
+M1 1AE,
+B33 8TH,199801
+not a postcode,
+GIR 0AA,
+"""
+
+
+@pytest.fixture(params=[1_000_000, 2], ids=["in-memory", "external-sort"])
+def index(tmp_path, request):
+    src = tmp_path / "pc.csv"
+    src.write_text(CSV, encoding="utf-8")
+    assert build_index(src, tmp_path / "pc.idx", chunk_records=request.param) == 5
+    with PostcodeIndex(tmp_path / "pc.idx") as idx:
+        yield idx
+
+
+def test_normalise_postcode():
+    assert normalise_postcode(" sw1a1aa ") == "SW1A 1AA"
+    assert normalise_postcode("GIR0AA") == "GIR 0AA"
+    assert normalise_postcode("SW1A") is None
+    assert normalise_postcode(None) is None
+
+
+def test_lookup(index):
+    assert len(index) == 5
+    m = index.lookup("ec1a 1bb")
+    assert (m.postcode, m.terminated) == ("EC1A 1BB", False)
+    assert index.lookup("ZZ1 1ZZ") is None
+    assert index.lookup("garbage") is None
+    assert "GIR 0AA" in index
+
+
+def test_terminated(index):
+    assert index.lookup("B33 8TH").terminated
+    # A postcode with both a live and a terminated row is live.
+    assert not index.lookup("M1 1AE").terminated
+
+
+def test_lookup_many(index):
+    got = index.lookup_many(["b338th", "SW1A 1AA", "sw1a1aa", "ZZ1 1ZZ", "nope"])
+    assert got["b338th"].terminated
+    assert got["SW1A 1AA"].postcode == got["sw1a1aa"].postcode == "SW1A 1AA"
+    assert got["ZZ1 1ZZ"] is None and got["nope"] is None
+
+
+def test_rejects_non_index_files(tmp_path):
+    for name, data in (("empty", b""), ("short", b"PCIX"), ("junk", b"x" * 64)):
+        p = tmp_path / name
+        p.write_bytes(data)
+        with pytest.raises(ValueError):
+            PostcodeIndex(p)
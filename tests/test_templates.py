@@ -0,0 +1,51 @@
+import pytest
+
+from core import evaluate_rules
+from models import new_deal
+from templates import TEMPLATES, get_template, register, render, render_many
+
+
+def deal():
+    d = new_deal("deal_001")
+    d["applicant"]["legalName"] = "Acme Vans Ltd"
+    d["fleetOps"]["avgRevenuePerVehiclePerMonth"]["amount"] = 1234.5
+    return d
+
+
+def test_funding_narrative():
+    text = render("funding_narrative", deal())
+    assert text.startswith("Applicant: Acme Vans Ltd\nBusiness: UK vehicle hire (mixed).")
+    assert "approx GBP 1,234." in text
+
+
+def test_missing_values():
+    d = deal()
+    del d["fleetOps"]["avgRevenuePerVehiclePerMonth"]
+    del d["applicant"]["legalName"]
+    text = render("funding_narrative", d)
+    assert text.startswith("Applicant: \n")
+    assert "approx GBP 0." in text
+
+
+def test_lender_email_and_render_many():
+    d = deal()
+    rr = evaluate_rules(d)
+    email = render("lender_email", d, rr)
+    assert email.startswith("Subject: Acme Vans Ltd (deal_001) – pack status RED")
+    assert list(render_many("lender_email", [("deal_001", d, None)])) == [("deal_001", email)]
+
+
+def test_unknown_template_or_version():
+    with pytest.raises(KeyError, match="Unknown template"):
+        get_template("no_such_template")
+    with pytest.raises(KeyError, match="Unknown version 99"):
+        get_template("funding_narrative", 99)
+    with pytest.raises(ValueError, match="already registered"):
+        register("funding_narrative", 1, "changed")
+
+
+@pytest.mark.parametrize("source", ["{}", "{0}", "{a[0]}", "{applicant.legalNam}", "{broker:{w}}", "{status!r}"])
+def test_bad_fields_fail_at_register(source):
+    with pytest.raises(ValueError):
+        register("test_bad", 1, source)
+    assert "test_bad" not in TEMPLATES